@@ -23,6 +23,9 @@ from typing import List,Tuple
 import numpy as np
 import random
 class SimWindow:
+    #Half of the side of the square drawn around each gate.
+    _GATE_HALF = 5
+
     def __init__(self,draw_bridges:bool=False):
         """
         Each instance of this class maintains a window 
@@ -54,6 +57,14 @@ class SimWindow:
         self.caracol = []
         self.in_gates = []
         self.out_gates = []
+        self._bridge_points = []
+        self._in_gate_rects = []
+        self._out_gate_rects = []
+        self._vehicle_pool = []
+        self._shown_vehicles = 0
+        self._overlay_cache_key = None
+        self._last_slider_state = (self.zoom, self.offset[0], self.offset[1])
+        self._build_static_canvas()
         
     def set_roads(self,segs:list[(int,int)]):
         """
@@ -71,6 +82,8 @@ class SimWindow:
         No check is implemented to make sure that the position is correct.
         """
         self.segments = segs.copy()
+        self._bridge_points = self._find_bridge_intersections() if self.draw_bridges else []
+        self._build_static_canvas()
        
     def set_in_gates(self,gates:list[(int,int)]):
         """
@@ -83,6 +96,8 @@ class SimWindow:
         No check is implemented to make sure that the position is correct.
         """
         self.in_gates = gates.copy()
+        self._in_gate_rects = self._gate_rects(self.in_gates)
+        self._build_static_canvas()
         
     def set_out_gates(self,gates:list[(int,int)]):
         """
@@ -95,6 +110,8 @@ class SimWindow:
         No check is implemented to make sure that the position is correct.
         """     
         self.out_gates = gates.copy()
+        self._out_gate_rects = self._gate_rects(self.out_gates)
+        self._build_static_canvas()
         
     def _setup(self):
         dpg.create_context()
@@ -129,7 +146,14 @@ class SimWindow:
         )
         
         dpg.add_draw_node(tag="OverlayCanvas", parent="MainWindow")
-        dpg.add_draw_node(tag="Canvas", parent="MainWindow")
+        dpg.add_draw_node(tag="GridCanvas", parent="MainWindow")
+        dpg.add_draw_node(tag="StaticCanvas", parent="MainWindow")
+        dpg.add_draw_node(tag="DynamicCanvas", parent="MainWindow")
+
+        #The background and the axes are created once and only moved by _render_loop.
+        dpg.draw_rectangle((0, 0), (0, 0), thickness=0, tag="Background", parent="OverlayCanvas")
+        dpg.draw_line((0, 0), (0, 0), thickness=2, tag="AxisX", parent="OverlayCanvas")
+        dpg.draw_line((0, 0), (0, 0), thickness=2, tag="AxisY", parent="OverlayCanvas")
 
         with dpg.window(
             tag="ControlsWindow",
@@ -171,9 +195,10 @@ class SimWindow:
             self.zoom_speed = 1 + 0.01*app_data
 
     def _update_inertial_zoom(self, clip=0.005):
-        if self.zoom_speed != 1:
-            self.zoom *= self.zoom_speed
-            self.zoom_speed = 1 + (self.zoom_speed - 1) / 1.05
+        if self.zoom_speed == 1:
+            return
+        self.zoom *= self.zoom_speed
+        self.zoom_speed = 1 + (self.zoom_speed - 1) / 1.05
         if abs(self.zoom_speed - 1) < clip:
             self.zoom_speed = 1
 
@@ -219,73 +244,101 @@ class SimWindow:
         dpg.destroy_context()
 
     def _update_offset_zoom_slider(self):
-        dpg.set_value("ZoomSlider", self.zoom)
-        dpg.set_value("OffsetXSlider", self.offset[0])
-        dpg.set_value("OffsetYSlider", self.offset[1])
-
-    @property
-    def _canvas_width(self):
-        return dpg.get_item_width("MainWindow")
-
-    @property
-    def _canvas_height(self):
-        return dpg.get_item_height("MainWindow")
+        """
+        Writes the camera back into the sliders, only for the values that changed since the last frame.
+        """
+        state = (self.zoom, self.offset[0], self.offset[1])
+        last = self._last_slider_state
+        if state == last:
+            return
+        for tag, value, old in zip(("ZoomSlider", "OffsetXSlider", "OffsetYSlider"), state, last):
+            if value != old:
+                dpg.set_value(tag, value)
+        self._last_slider_state = state
+
+    def _update_canvas_size(self):
+        """
+        Reads the size of the main window once per frame, so the drawing functions
+        use plain attributes instead of querying dearpygui on every access.
+        """
+        self._canvas_width = dpg.get_item_width("MainWindow")
+        self._canvas_height = dpg.get_item_height("MainWindow")
 
     def _draw_bg(self, color=(250, 250, 250)):
-        dpg.draw_rectangle(
-            (-10, -10),
-            (self._canvas_width+10, self._canvas_height+10), 
-            thickness=0,
-            fill=color,
-            parent="OverlayCanvas"
+        dpg.configure_item(
+            "Background",
+            pmin=(-10, -10),
+            pmax=(self._canvas_width+10, self._canvas_height+10),
+            fill=color
         )
 
     def _draw_axes(self, opacity=80):
         x_center, y_center = self._to_screen(0, 0)
 
-        dpg.draw_line(
-            (-10, y_center),
-            (self._canvas_width+10, y_center),
-            thickness=2, 
-            color=(0, 0, 0, opacity),
-            parent="OverlayCanvas"
+        dpg.configure_item(
+            "AxisX",
+            p1=(-10, y_center),
+            p2=(self._canvas_width+10, y_center),
+            color=(0, 0, 0, opacity)
         )
-        dpg.draw_line(
-            (x_center, -10),
-            (x_center, self._canvas_height+10),
-            thickness=2,
-            color=(0, 0, 0, opacity),
-            parent="OverlayCanvas"
+        dpg.configure_item(
+            "AxisY",
+            p1=(x_center, -10),
+            p2=(x_center, self._canvas_height+10),
+            color=(0, 0, 0, opacity)
         )
 
     
     def _draw_grid(self, unit=10, opacity=50):
+        width, height = self._canvas_width, self._canvas_height
+        zoom = self.zoom
+        offset_x, offset_y = self.offset
         x_start, y_start = self._to_world(0, 0)
-        x_end, y_end = self._to_world(self._canvas_width, self._canvas_height)
+        x_end, y_end = self._to_world(width, height)
 
         n_x = int(x_start / unit)
         n_y = int(y_start / unit)
         m_x = int(x_end / unit)+1
         m_y = int(y_end / unit)+1
 
-        for i in range(n_x, m_x):
+        #The lines span the canvas with a margin of 10 pixels on both sides.
+        xs = width/2 + (np.arange(n_x, m_x)*unit + offset_x) * zoom
+        ys = height/2 + (np.arange(n_y, m_y)*unit + offset_y) * zoom
+
+        for x in xs.tolist():
             dpg.draw_line(
-                self._to_screen(unit*i, y_start - 10/self.zoom),
-                self._to_screen(unit*i, y_end + 10/self.zoom),
+                (x, -10),
+                (x, height + 10),
                 thickness=1,
                 color=(0, 0, 0, opacity),
-                parent="OverlayCanvas"
+                parent="GridCanvas"
             )
 
-        for i in range(n_y, m_y):
+        for y in ys.tolist():
             dpg.draw_line(
-                self._to_screen(x_start - 10/self.zoom, unit*i),
-                self._to_screen(x_end + 10/self.zoom, unit*i),
+                (-10, y),
+                (width + 10, y),
                 thickness=1,
                 color=(0, 0, 0, opacity),
-                parent="OverlayCanvas"
+                parent="GridCanvas"
             )
 
+    def _update_overlay(self):
+        """
+        Moves the background and the axes and redraws the grid only when the size of the canvas
+        or the camera changed since the last frame. A stationary camera costs no draw calls.
+        """
+        key = (self._canvas_width, self._canvas_height, self.zoom, self.offset)
+        if key == self._overlay_cache_key:
+            return
+        self._overlay_cache_key = key
+
+        self._draw_bg()
+        self._draw_axes()
+        dpg.delete_item("GridCanvas", children_only=True)
+        self._draw_grid(unit=10)
+        self._draw_grid(unit=50)
+
 
     def _to_screen(self, x, y):
         return (
@@ -303,110 +356,176 @@ class SimWindow:
         screen_center = dpg.create_translation_matrix([self._canvas_width/2, self._canvas_height/2, -0.01])
         translate = dpg.create_translation_matrix(self.offset)
         scale = dpg.create_scale_matrix([self.zoom, self.zoom])
-        dpg.apply_transform("Canvas", screen_center*scale*translate)
+        dpg.apply_transform("StaticCanvas", screen_center*scale*translate)
+        dpg.apply_transform("DynamicCanvas", screen_center*scale*translate)
+
+    def _build_static_canvas(self):
+        """
+        Draws the geometry that does not change between frames (segments, gates and bridges) once
+        into the StaticCanvas node. Only the transformation of the node is updated each frame,
+        the drawing is rebuilt when the map changes and rescaled in place when the zoom changes.
+        """
+        dpg.delete_item("StaticCanvas", children_only=True)
+        self._static_zoom = self.zoom
+        self._static_lines = []
+        self._static_circles = []
+        self._draw_segments()
+        self._draw_gates()
+        if self.draw_bridges:
+            self._draw_bridge_intersections()
+
+    def _rescale_static_canvas(self):
+        """
+        Updates the thickness of the segments and the radius of the caps and bridges to the current zoom,
+        without recreating the items of the StaticCanvas.
+        """
+        self._static_zoom = self.zoom
+        thickness = 5*self.zoom
+        for tag in self._static_lines:
+            dpg.configure_item(tag, thickness=thickness)
+
+        radius = 2.5*self.zoom
+        for tag in self._static_circles:
+            dpg.configure_item(tag, radius=radius)
 
 
     def _draw_segments(self):
+        thickness = 5*self.zoom
         for segment in self.segments:
-            dpg.draw_polyline(segment, color=(180, 180, 220), thickness=5*self.zoom, parent="Canvas")
-            dpg.draw_circle(segment[0],2.5*self.zoom, color=(220, 220, 220), fill=(220, 220, 220), thickness=0, parent="Canvas")
-            dpg.draw_circle(segment[1],2.5*self.zoom, color=(220, 220, 220), fill=(220, 220, 220), thickness=0, parent="Canvas")
+            self._static_lines.append(
+                dpg.draw_polyline(segment, color=(180, 180, 220), thickness=thickness, parent="StaticCanvas"))
+
+        #Segments share their endpoints, so every node only needs a single cap.
+        radius = 2.5*self.zoom
+        for node in dict.fromkeys(node for segment in self.segments for node in segment):
+            self._static_circles.append(
+                dpg.draw_circle(node, radius, color=(220, 220, 220), fill=(220, 220, 220), thickness=0, parent="StaticCanvas"))
+
+    def _find_bridge_intersections(self):
+        """
+        Finds the crossings (bridges) between segments that do not correspond to segments' junctions.
+        Every pair of segments is tested at once with numpy, only the collinear pairs are resolved one by one.
+        The segments do not change after set_roads, so this is only computed once per map.
+
+        Returns:
+        ----------
+        List[(float,float)]
+        The positions of the bridges.
+        """
+        if len(self.segments) < 2:
+            return []
+
+        segs = np.array(self.segments)
+        x0, y0 = segs[:,0,0], segs[:,0,1]
+        x1, y1 = segs[:,1,0], segs[:,1,1]
+        dx = x0 - x1
+        dy = y0 - y1
+
+        #Every pair (i,j) with i<j, the same pairs as a nested loop over the segments.
+        i, j = np.triu_indices(len(segs), k=1)
+        det = dx[i]*dy[j] - dy[i]*dx[j]
+        dt1 = dy[j]*(x0[i] - x1[j]) - dx[j]*(y0[i] - y1[j])
+        dt2 = dx[i]*(y0[j] - y1[i]) - dy[i]*(x0[j] - x1[i])
+
+        crossing = det != 0
+        ci, cj = i[crossing], j[crossing]
+        t1 = 1/det[crossing] * dt1[crossing]
+        t2 = 1/det[crossing] * dt2[crossing]
+
+        dd = np.hypot(dx, dy)
+        inside = (t1 >= 0) & (t1 <= 1) & (t2 >= 0) & (t2 <= 1)
+        not_junction = ((t1 >= 1/dd[ci]) & (t1 <= 1-1/dd[ci])) | ((t2 >= 1/dd[cj]) & (t2 <= 1-1/dd[cj]))
+        hit = inside & not_junction
+
+        ci, t1 = ci[hit], t1[hit]
+        bx = (x1[ci] - x0[ci])*t1 + x0[ci]
+        by = (y1[ci] - y0[ci])*t1 + y0[ci]
+        bridges = list(zip(bx.tolist(), by.tolist()))
+
+        collinear = ~crossing & (dt1 == 0) & (dt2 == 0)
+        for a, b in zip(i[collinear].tolist(), j[collinear].tolist()):
+            bridges.extend(self._collinear_bridges(self.segments[a], self.segments[b]))
+        return bridges
+
+    @staticmethod
+    def _collinear_bridges(seg, other):
+        """
+        Returns the bridge points where two collinear segments overlap.
+        """
+        #Vertical segments overlap along y, horizontal segments along x.
+        if seg[0][1] == seg[1][1]:
+            axis = 0
+        elif seg[0][0] == seg[1][0]:
+            axis = 1
+        else:
+            return []
+
+        s0 = sorted([seg[0][axis], seg[1][axis]])
+        s1 = sorted([other[0][axis], other[1][axis]])
+        p0 = sorted(s0 + s1)
+        if (p0[0:2]==s0) or (p0[0:2]==s1):
+            return []
+
+        fixed = seg[0][1-axis]
+        ks = np.arange(p0[1],p0[2])
+        ks = ks[ks != seg[0][axis]].tolist()
+        if axis == 1:
+            return [(fixed,k) for k in ks]
+        return [(k,fixed) for k in ks]
 
     def _draw_bridge_intersections(self):
-        bridges=[]
-        for i in range(len(self.segments)):
-            pp= self.segments[i]
-            x0=pp[0][0]
-            x1=pp[1][0]
-            y0=pp[0][1]
-            y1=pp[1][1]
-            dx = x0 - x1
-            dy = y0 - y1
-            for j in range(i+1,len(self.segments)):
-                pp= self.segments[j]
-                X0=pp[0][0]
-                X1=pp[1][0]
-                Y0=pp[0][1]
-                Y1=pp[1][1]
-                dX = X0 - X1
-                dY = Y0 - Y1
-
-                det = dx*dY -dy*dX
-                dt1 = (dY *(x0 - X1) - dX *(y0 - Y1))
-                dt2 = (dx *(Y0 - y1) - dy* (X0 - x1) )
-                if(det!=0):
-                    t1 = 1/det * dt1
-                    t2 = 1/det * dt2
-                    if (t1 >=0  )  and  (t1 <= 1 ) and (t2 >=  0)  and  (t2 <= 1 ):
-                        dd = np.sqrt(dx**2 + dy**2)
-                        DD = np.sqrt(dX**2 + dY**2)
-                        if ( ( t1 >= 1/(dd) ) and ( t1 <= 1-1/(dd) ) ) or  ( ( t2 >= 1/(DD) ) and ( t2 <= 1-1/(DD) ) ):
-                            bridges.append(((x1 - x0)*t1 + x0, (y1 - y0) * t1 + y0))
-                else:
-                    if(dt1 ==0 ) and (dt2 == 0):
-                        if (self.segments[i][0][0] == self.segments[i][1][0]):
-                            s0=[self.segments[i][0][1],self.segments[i][1][1]]
-                            s1=[self.segments[j][0][1],self.segments[j][1][1]]
-                            p0 = [self.segments[i][0][1],self.segments[i][1][1],self.segments[j][0][1],self.segments[j][1][1]]
-                        if (self.segments[i][0][1] == self.segments[i][1][1]):
-                            s0=[self.segments[i][0][0],self.segments[i][1][0]]
-                            s1=[self.segments[j][0][0],self.segments[j][1][0]]
-                            p0 = [self.segments[i][0][0],self.segments[i][1][0],self.segments[j][0][0],self.segments[j][1][0]]
-                        p0.sort()
-                        s0.sort()
-                        s1.sort()
-                        
-                        if (p0[0:2]==s0) or (p0[0:2]==s1):
-                            continue
-                        
-                        p1 = p0[1:3]
-                        if (self.segments[i][0][0] == self.segments[i][1][0]):
-                            for k in range(p1[0],p1[1]):
-                                if(k!=self.segments[i][0][1]):
-                                    bridges.append((self.segments[i][0][0],k))             
-                        if (self.segments[i][0][1] == self.segments[i][1][1]):
-                            for k in range(p1[0],p1[1]):
-                                if(k!=self.segments[i][0][0]):
-                                    bridges.append((k,self.segments[i][0][1]))             
-        for wp in bridges:
-            dpg.draw_circle(wp,2.5*self.zoom, color=(0, 0, 0), fill=(0, 0, 0), thickness=0, parent="Canvas")
+        for wp in self._bridge_points:
+            self._static_circles.append(
+                dpg.draw_circle(wp,2.5*self.zoom, color=(0, 0, 0), fill=(0, 0, 0), thickness=0, parent="StaticCanvas"))
 
   
     def _draw_vehicles(self):
-        for id in range(len(self.vehicles)):
-            dpg.draw_circle(self.vehicles[id],2.5*self.zoom, color=self.caracol[id], fill=self.caracol[id], thickness=0, parent="Canvas")
+        """
+        Moves a pool of circles to the positions of the vehicles instead of recreating them every frame.
+        The pool grows with the number of vehicles, circles that are not needed are hidden.
+        """
+        radius = 2.5*self.zoom
+        total = len(self.vehicles)
+        pool = self._vehicle_pool
+        while len(pool) < total:
+            pool.append(dpg.draw_circle((0, 0), radius, thickness=0, show=False, parent="DynamicCanvas"))
+
+        for tag, position, color in zip(pool, self.vehicles, self.caracol):
+            dpg.configure_item(tag, center=position, radius=radius, color=color, fill=color, show=True)
+
+        for tag in pool[total:self._shown_vehicles]:
+            dpg.configure_item(tag, show=False)
+        self._shown_vehicles = total
 
     def _draw_gates(self):
-        for gate in self.in_gates:
-            p1=(np.array(gate) - np.array((5,5))).tolist()
-            p2=(np.array(gate) + np.array((5,5))).tolist()
-            dpg.draw_rectangle(p1,p2, color=(124,252,0), fill=(24,252,0), thickness=0, parent="Canvas")
+        for p1, p2 in self._in_gate_rects:
+            dpg.draw_rectangle(p1,p2, color=(124,252,0), fill=(24,252,0), thickness=0, parent="StaticCanvas")
+
+        for p1, p2 in self._out_gate_rects:
+            dpg.draw_rectangle(p1,p2, color=(0,0,139), fill=(0,0,139), thickness=0, parent="StaticCanvas")
 
-        for gate in self.out_gates:
-            p1=(np.array(gate) - np.array((5,5))).tolist()
-            p2=(np.array(gate) + np.array((5,5))).tolist()
-            dpg.draw_rectangle(p1,p2, color=(0,0,139), fill=(0,0,139), thickness=0, parent="Canvas")
+    @staticmethod
+    def _gate_rects(gates):
+        """
+        Returns the corners of the square drawn around each gate.
+        """
+        half = SimWindow._GATE_HALF
+        return [((gx-half, gy-half), (gx+half, gy+half)) for gx, gy in gates]
 
 
     def _render_loop(self,updatecar):
         ## Events
+        self._update_canvas_size()
         self._update_inertial_zoom()
         self._update_offset_zoom_slider()
 
-       ## Remove old drawings
-        dpg.delete_item("OverlayCanvas", children_only=True)
-        dpg.delete_item("Canvas", children_only=True)
+       ## Nothing is deleted per frame, the existing items are moved or rescaled.
+        if self.zoom != self._static_zoom:
+            self._rescale_static_canvas()
        
-       ## New drawings
-        self._draw_bg()
-        self._draw_axes()
-        self._draw_grid(unit=10)
-        self._draw_grid(unit=50)
-        self._draw_segments()
-        self._draw_gates()
+       ## Update drawings
+        self._update_overlay()
         self._draw_vehicles()
-        if self.draw_bridges :
-            self._draw_bridge_intersections()
 
        ## Apply transformations
         self._apply_transformation()
@@ -0,0 +1,168 @@
+"""
+Micro benchmarks of the hot paths of the road network generation and validation, and of car generation.
+The benchmarks are not collected as unittests, run them from the Road_network_simulation directory with:
+
+    python -m Tests.benchmarks [sizes ...]
+
+Every entry point is timed on random road networks of the given numbers of segments, and the best of several
+repeats is printed per call, as the minimum is the measurement least affected by other load on the machine.
+Lastly the upscale is timed on chains of growing length, to show that its time grows linearly with the size.
+"""
+import math
+import random
+import sys
+import timeit
+from modules import loggers
+from modules.road import Road
+from modules.roadnetworkgenerator import CustomRoadNetwork, RandomRoadNetwork
+
+SIZES = [20, 200, 2000]
+UPSCALE_SIZES = [100, 1000, 10000]
+REPEATS = 7
+
+
+def random_network(total_segments: int, seed: int = 0) -> RandomRoadNetwork:
+    """
+    Generates a seeded random road network, so the benchmarks time the same network on every run.
+
+    Args:
+        total_segments (int): The number of segments of the road network.
+        seed (int): The seed of the random module.
+
+    Returns:
+        RandomRoadNetwork: The generated road network.
+    """
+    random.seed(seed)
+    return RandomRoadNetwork(total_segments, 1, enforce_valid_paths=False)
+
+
+def sorted_segments(network: RandomRoadNetwork):
+    """
+    Splits the segments of a road network into vertical and horizontal segments, as validate_roads does.
+
+    Args:
+        network (RandomRoadNetwork): The road network.
+
+    Returns:
+        List[Segment],List[Segment]: The vertical and the horizontal segments.
+    """
+    return CustomRoadNetwork._sort_by_direction(network.convert_to_segments())
+
+
+def chain_network(total_segments: int) -> RandomRoadNetwork:
+    """
+    Builds a straight chain of segments along the y axis, without running the random generation.
+
+    Args:
+        total_segments (int): The number of segments of the chain.
+
+    Returns:
+        RandomRoadNetwork: The road network holding the chain.
+    """
+    network = RandomRoadNetwork.__new__(RandomRoadNetwork)
+    network.outgoing, network.incoming = {}, {}
+    for i in range(total_segments):
+        network._add_segment(((0, i), (0, i + 1)))
+    return network
+
+
+def best_time(function, number: int) -> float:
+    """
+    Times a function and returns the best time of a single call over the repeats.
+
+    Args:
+        function (Callable): The function to time, called without arguments.
+        number (int): The number of calls per repeat.
+
+    Returns:
+        float: The best time of a single call in seconds.
+    """
+    return min(timeit.repeat(function, number=number, repeat=REPEATS)) / number
+
+
+def benchmarks(total_segments: int):
+    """
+    Returns the benchmarks of the entry points for road networks of a given size.
+
+    Args:
+        total_segments (int): The number of segments of the road networks.
+
+    Returns:
+        List[Tuple[str, Callable]]: The name and the function of every benchmark.
+    """
+    network = random_network(total_segments)
+    vertical_lines, horizontal_lines = sorted_segments(network)
+
+    def generate():
+        random.seed(0)
+        RandomRoadNetwork(total_segments, 1, enforce_valid_paths=False)
+
+    def upscale():
+        #The copy is scaled, so the network keeps its size between the calls.
+        copy = RandomRoadNetwork.__new__(RandomRoadNetwork)
+        copy.outgoing, copy.incoming = network.outgoing, network.incoming
+        copy._upscale_road_network(10)
+
+    road = Road([(0, 0), (0, 100)], (0, 1), clearance=1, probability=1, entry=True)
+
+    def generate_car():
+        road.cars.clear()
+        road.generate_car_from_gate()
+
+    return [
+        ("RandomRoadNetwork.__init__", generate),
+        ("_upscale_road_network", upscale),
+        ("_check_adjacent_overlap", lambda: (CustomRoadNetwork._check_adjacent_overlap(vertical_lines, 'vertical'),
+                                             CustomRoadNetwork._check_adjacent_overlap(horizontal_lines, 'horizontal'))),
+        ("_check_intersections", lambda: CustomRoadNetwork._check_intersections(horizontal_lines, vertical_lines)),
+        ("_check_is_connected_network", lambda: CustomRoadNetwork._check_is_connected_network(network)),
+        ("Road.generate_car_from_gate", generate_car),
+    ]
+
+
+def upscale_scaling(sizes) -> float:
+    """
+    Times _upscale_road_network on chains of the given sizes and estimates how the time grows with the size.
+    The upscale must stay linear, a slope near 2 points at a quadratic regression.
+
+    Args:
+        sizes (List[int]): The numbers of segments of the chains, at least two different sizes.
+
+    Returns:
+        float: The slope of the times against the sizes on a log-log scale, from the smallest to the largest size.
+    """
+    times = []
+    for total_segments in sizes:
+        network = chain_network(total_segments)
+        outgoing, incoming = network.outgoing, network.incoming
+
+        def upscale():
+            #The chain is restored, so every call scales the same network.
+            network.outgoing, network.incoming = outgoing, incoming
+            network._upscale_road_network(3)
+
+        times.append(best_time(upscale, max(1, 10000 // total_segments)))
+        print(f"{total_segments:>6} segments  {'_upscale_road_network (chain)':<30} {times[-1] * 1e6:12.1f} us")
+    return math.log(times[-1] / times[0]) / math.log(sizes[-1] / sizes[0])
+
+
+def main(sizes) -> None:
+    """
+    Runs every benchmark for every size and prints the best time per call.
+
+    Args:
+        sizes (List[int]): The numbers of segments of the road networks.
+    """
+    #The validation passes log every step, which would be timed as well.
+    loggers.terminal_logger.disabled = True
+    for total_segments in sizes:
+        for name, function in benchmarks(total_segments):
+            #Fewer calls per repeat for the larger networks, so a run stays short.
+            number = max(1, 2000 // total_segments)
+            print(f"{total_segments:>6} segments  {name:<30} {best_time(function, number) * 1e6:12.1f} us")
+
+    print(f"Slope of the upscale time against the size: {upscale_scaling(UPSCALE_SIZES):.2f}")
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or SIZES)
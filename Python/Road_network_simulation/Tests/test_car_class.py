@@ -1,6 +1,7 @@
 import unittest
 from modules.car import Car
 import numpy as np
+import random
 
 class TestCar(unittest.TestCase):
     def test_init(self):
@@ -24,4 +25,28 @@ class TestCar(unittest.TestCase):
     def test_move(self):
         car = Car(position=[0, 0])
         car.move(np.array((1, 1)))
-        self.assertTrue((car.position == np.array([1, 1])).all())
\ No newline at end of file
+        self.assertTrue((car.position == np.array([1, 1])).all())
+
+    def test_color_and_speed_range(self):
+        for _ in range(100):
+            car = Car(position=[0, 0], speed_range=(0.5, 1.5))
+            self.assertTrue(0.5 <= car.max_speed <= 1.5)
+            self.assertTrue(all(0 <= channel < 256 for channel in car.color))
+        # Reset the generation count
+        Car.generation_count = 1
+
+    def test_given_color_and_speed(self):
+        car = Car(position=[0, 0], color=(1, 2, 3), max_speed=0.9)
+        self.assertEqual(car.color, (1, 2, 3))
+        self.assertEqual(car.max_speed, 0.9)
+        # Reset the generation count
+        Car.generation_count = 1
+
+    def test_seeded_random_module(self):
+        properties = []
+        for _ in range(2):
+            random.seed(1)
+            properties.append([(car.color, car.max_speed) for car in [Car(position=[0, 0]) for _ in range(3)]])
+        self.assertEqual(properties[0], properties[1])
+        # Reset the generation count
+        Car.generation_count = 1
@@ -1,10 +1,18 @@
 import unittest
-from unittest.mock import patch
 from modules.roadnetworkgenerator import CustomRoadNetwork as dt
 import logging 
 logging.disable(logging.CRITICAL)
 
 
+def unchecked_network(segments):
+    """Builds a road network from segments without the gates and validation of __init__, so single checks can be tested."""
+    network = dt.__new__(dt)
+    network.outgoing = {}
+    network.incoming = {}
+    network._generate_roads(segments)
+    return network
+
+
 class Test_adjacent_overlap(unittest.TestCase):
 
     def test_duplicate_lines_vertical(self):
@@ -31,6 +39,12 @@ class Test_adjacent_overlap(unittest.TestCase):
         result = dt._check_adjacent_overlap(segments,'horizontal')
         self.assertEqual(result,None)
 
+    def test_overlap_separated_by_other_line(self):
+        #The segment on y=5 lies between the two overlapping segments on y=0 when sorted by x.
+        segments = [((0,0),(4,0)),((1,5),(2,5)),((2,0),(6,0))]
+        with self.assertRaises(ValueError):
+            dt._check_adjacent_overlap(segments,'horizontal')
+
     def test_correct_test_only_if_sorted(self):
         segments = [((1,0),(5,0)),((-1,0),(0,0)),((3,0),(3,6))]
         with self.assertRaises(ValueError):
@@ -92,24 +106,24 @@ class Test_intersections(unittest.TestCase):
         result = dt._check_intersections(horizontal,vertical)
         self.assertEqual(result,None)
 
+    def test_broadcast_and_sweep_find_same_pair(self):
+        horizontal = [((0,0),(5,0)), ((0,4),(5,4)), ((6,2),(9,2))]
+        vertical = [((7,-1),(7,1)), ((3,4),(3,7)), ((2,-3),(2,5))]
+        self.assertEqual(dt._first_invalid_pair_broadcast(horizontal,vertical), (0,2,True))
+        self.assertEqual(dt._first_invalid_pair_sweep(horizontal,vertical), (0,2,True))
+
 class Test_connected_network(unittest.TestCase):
 
     def test_is_connected_network_directed(self):
 
-        def patched_init(self,segments):
-            self.outgoing = {}
-            self.incoming = {}
-            self._generate_roads(segments)
-
         segments =[ 
             ((0, 0), (1, 0)),
             ((1, 0), (1, 1)),  
             ((1, 1), (2, 1)),  
             ((2, 1), (10, 1))]
-        with patch.object(dt, '__init__', patched_init):
-            road_network = dt(segments)
-            result = road_network._check_is_connected_network()
-            self.assertEqual(result, None)
+        road_network = unchecked_network(segments)
+        result = road_network._check_is_connected_network()
+        self.assertEqual(result, None)
         
     def test_is_not_connected_network(self):
         segments =[
@@ -117,15 +131,9 @@ class Test_connected_network(unittest.TestCase):
             ((1, 0), (1, 1)),
             ((1, 1), (2, 1)),
             ((50, 50), (50, 60))]
-        
-        def patched_init(self,segments):
-            self.outgoing = {}
-            self.incoming = {}
-            self._generate_roads(segments)
-        with patch.object(dt, '__init__', patched_init):
-            with self.assertRaises(ValueError):
-                a = dt(segments)
-                a._check_is_connected_network()
+        with self.assertRaises(ValueError):
+            a = unchecked_network(segments)
+            a._check_is_connected_network()
 
     def test_is_connnected_only_if_undirected(self):
         segments =[
@@ -135,14 +143,8 @@ class Test_connected_network(unittest.TestCase):
             ((2, 1), (2, 2)),
             ((2, 4), (2, 2))]
         
-        def patched_init(self,segments):
-            self.outgoing = {}
-            self.incoming = {}
-            self._generate_roads(segments)
-        
-        with patch.object(dt, '__init__', patched_init):
-            a = dt(segments)
-            a._check_is_connected_network()
+        a = unchecked_network(segments)
+        a._check_is_connected_network()
     
     def test_start_at_isolated_node(self):
         """Code always starts at first node."""
@@ -151,20 +153,10 @@ class Test_connected_network(unittest.TestCase):
             ((0, 0), (1, 0)),
             ((1, 0), (1, 1)),
             ((1, 1), (2, 1))]
-        def patched_init(self,segments):
-            self.outgoing = {}
-            self.incoming = {}
-            self._generate_roads(segments)
-        with patch.object(dt, '__init__', patched_init):
-            with self.assertRaises(ValueError):
-                a = dt(segments)
-                a._check_is_connected_network()
+        with self.assertRaises(ValueError):
+            a = unchecked_network(segments)
+            a._check_is_connected_network()
     def test_empty_road_network(self):
         segments =[]
-        def patched_init(self,segments):
-            self.outgoing = {}
-            self.incoming = {}
-            self._generate_roads(segments)
-        with patch.object(dt, '__init__', patched_init):
-            a = dt(segments)
-            a._check_is_connected_network()
+        a = unchecked_network(segments)
+        a._check_is_connected_network()
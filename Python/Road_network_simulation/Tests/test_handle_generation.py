@@ -0,0 +1,52 @@
+import importlib.util
+import os
+import random
+import tempfile
+import unittest
+import logging
+logging.disable(logging.CRITICAL)
+
+#The module name holds a hyphen, so it is loaded from its path.
+_spec = importlib.util.spec_from_file_location('highway_sim', os.path.join(os.path.dirname(__file__), '..', 'highway-sim.py'))
+highway_sim = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(highway_sim)
+Main = highway_sim.Main
+
+
+class Test_config_generation(unittest.TestCase):
+
+    def test_random_generation(self):
+        random.seed(0)
+        config = {'generation_type': 'random', 'disallow_unreachable_roads': 'no', 'total_segments': 20,
+                  'scaling_factor': 20, 'spawn_probability': 0.5, 'show': False}
+        main = Main(config)
+        self.assertEqual(len(main.road_network.convert_to_segments()), 20)
+        self.assertEqual(main.spawn_probability, 0.5)
+        self.assertEqual(len(main.map_manager.roads), 20)
+
+    def test_custom_generation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'segments.txt')
+            with open(path, 'w') as file:
+                file.write('0,0,0,40\n0,40,40,40\n')
+            config = {'generation_type': 'custom', 'disallow_unreachable_roads': 'no', 'path': path,
+                      'spawn_probability': 1, 'show': False}
+            main = Main(config)
+        self.assertEqual(main.road_network.convert_to_segments(), [((0, 0), (0, 40)), ((0, 40), (40, 40))])
+        self.assertEqual(main.road_network.entry_gates, [(0, 0)])
+
+    def test_invalid_custom_file_raises(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'segments.txt')
+            with open(path, 'w') as file:
+                file.write('0,0,0,40\n0,0,0,40\n')
+            config = {'generation_type': 'custom', 'disallow_unreachable_roads': 'no', 'path': path,
+                      'spawn_probability': 1, 'show': False}
+            with self.assertRaises(ValueError):
+                Main(config)
+
+    def test_missing_setting(self):
+        config = {'generation_type': 'random', 'disallow_unreachable_roads': 'no', 'scaling_factor': 20,
+                  'spawn_probability': 0.5, 'show': False}
+        with self.assertRaisesRegex(ValueError, 'total_segments'):
+            Main(config)
@@ -91,6 +91,23 @@ class Test_closest_incoming_car(unittest.TestCase):
 
         #expects the called car to be priority
         self.assertEqual(intersection1.closest_incoming_car(road.cars[0]), road.cars[0])
+
+    def test_closest_incoming_car_same_distance_priority_on_later_road(self):
+        position = (0, 0)
+        intersection1 = Intersection(position,6)
+
+        road = Road(((-20, 0), (0, 0)),(1,0),clearance = 6, entry = True)
+        road2 = Road(((20, 0), (0, 0)),(-1,0),clearance = 6, entry = True)
+
+        intersection1.add_incoming_road(road)
+        intersection1.add_incoming_road(road2)
+        road.generate_car_from_gate()
+        road2.generate_car_from_gate()
+        road.cars[0].move(np.array((-3,0)))
+        road2.cars[0].move(np.array((3,0)))
+
+        #the priority car wins the tie even if its road is not the first incoming road
+        self.assertEqual(intersection1.closest_incoming_car(road2.cars[0]), road2.cars[0])
     
 class Test_closest_outgoing_car(unittest.TestCase):
     def test_closest_outgoing_car(self):
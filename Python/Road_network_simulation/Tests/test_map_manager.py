@@ -2,6 +2,7 @@ import unittest
 from modules.map_manager import MapManager
 from modules.road import Road
 import numpy as np
+import random
 from modules import roadnetworkgenerator as rng
 
 
@@ -228,3 +229,87 @@ class Test_move_cars(unittest.TestCase):
         self.dt.move_cars()
         self.assertTrue(np.array_equal(car1.position, np.array((100,0))))
         self.assertEqual(len(self.dt.roads[0].cars), 0)
+
+    def test_move_cars_long_queue(self):
+        #Enough cars for the queue behind the first car to be moved in a single pass, also without numba.
+        self.dt._SINGLE_PASS_QUEUE = 8
+        road = self.dt.roads[0]
+        road.cars[0].position = np.array((70,0))
+        road.cars[0].max_speed = 1
+        for x in (63, 56, 49, 42, 35, 28, 21, 14, 7):
+            self.dt.generate_cars()
+            road.cars[-1].position = np.array((x,0))
+            road.cars[-1].max_speed = 3
+
+        self.dt.move_cars()
+        self.assertEqual([tuple(car.position) for car in road.cars],
+                         [(71,0), (65,0), (59,0), (52,0), (45,0), (38,0), (31,0), (24,0), (17,0), (10,0)])
+
+    def test_move_queue_matches_one_by_one(self):
+        #The cars are just over the clearance apart, so the clearance limits most of them and rounding would show.
+        road = self.dt.roads[0]
+        road.cars[0].position = (80.3, 0.0)
+        road.cars[0].max_speed = 0.7
+        for i in range(1, 12):
+            self.dt.generate_cars()
+            road.cars[-1].position = (80.3 - i * 6.1 + i * 0.01, 0.0)
+            road.cars[-1].max_speed = 1.3
+        start = [car.position for car in road.cars]
+        intersection = road.connected_intersection
+
+        self.dt._move_car(road.cars[0], None, road, intersection)
+        self.assertTrue(self.dt._move_queue(road, road.cars))
+        queued = [car.position for car in road.cars]
+
+        for car, position in zip(road.cars, start):
+            car.position = position
+        car_in_front = None
+        for car in road.cars:
+            self.dt._move_car(car, car_in_front, road, intersection)
+            car_in_front = car
+        self.assertEqual(queued, [car.position for car in road.cars])
+
+    def test_move_to_exit_with_car_behind(self):
+        #The first car leaves the road while the deque is iterated, which must not disturb the car behind it.
+        car1 = self.dt.roads[0].cars[0]
+        car1.position = np.array((95,0))
+        car1.max_speed = 10
+        self.dt.generate_cars()
+        car2 = self.dt.roads[0].cars[1]
+        car2.position = np.array((80,0))
+        car2.max_speed = 10
+
+        self.dt.move_cars()
+        self.assertEqual(list(self.dt.roads[0].cars), [car2])
+        self.assertEqual(car2.position, (90,0))
+
+
+class Test_seed(unittest.TestCase):
+
+    def test_same_seed_same_order(self):
+        segs = [((0,0),(100,0)), ((100,0), (100,100)), ((100,100),(0, 100)), ((0,100),(0,0)),
+        ((0,0),(0,-100)), ((200,100),(100,100))]
+        customnetwork = rng.CustomRoadNetwork(segs)
+        orders = []
+        for _ in range(2):
+            dt = MapManager(customnetwork.outgoing, clearance=6, entry_gates=[(200,100)], exit_gates=[(0,-100)], probability=1, seed=7)
+            dt.move_cars()
+            orders.append([dt.roads.index(road) for road in dt._road_order])
+        self.assertEqual(orders[0], orders[1])
+
+    def test_same_seed_same_run(self):
+        #The network branches at (0,0), so the cars also depend on the random choice of the next road.
+        segs = [((0,0),(100,0)), ((100,0), (100,100)), ((100,100),(0, 100)), ((0,100),(0,0)),
+        ((0,0),(0,-100)), ((200,100),(100,100))]
+        customnetwork = rng.CustomRoadNetwork(segs)
+        runs = []
+        for module_seed in range(2):
+            #The random module is seeded differently, as a seeded map must not depend on it.
+            random.seed(module_seed)
+            dt = MapManager(customnetwork.outgoing, clearance=6, entry_gates=[(200,100)], exit_gates=[(0,-100)], probability=0.5, seed=7)
+            positions, colors = [], []
+            for _ in range(400):
+                dt.update_car(positions, colors)
+            runs.append((list(positions), list(colors)))
+        self.assertTrue(runs[0][0])
+        self.assertEqual(runs[0], runs[1])
@@ -2,6 +2,14 @@ import unittest
 from unittest.mock import patch
 from modules.roadnetworkgenerator import RandomRoadNetwork as dt
 
+
+def blank_network():
+    """Returns an empty road network without running the random generation, for tests that set up the network themselves."""
+    network = dt.__new__(dt)
+    super(dt, network).__init__()
+    network.blocked_nodes = set()
+    return network
+
 class Test_generate(unittest.TestCase):
     def test_generate_amount(self):
         """Tests generation of a road network with 20 segments"""
@@ -28,7 +36,7 @@ class Test_find_endnode(unittest.TestCase):
         """Tests generation of a longer road, where same direction is picked twice"""
         start_node = (0, 0)
         direction = (0, 1)
-        nw = dt(1,1)
+        nw = blank_network()
         nw.outgoing = {}
         nw.incoming = {}
         with patch('modules.utils.Utils.pick_item', side_effect=[(0, 1), (0, 1), (1, 0)]):
@@ -41,7 +49,7 @@ class Test_find_endnode(unittest.TestCase):
         direction = (0, 1)
 
         with patch('modules.utils.Utils.pick_item', return_value=(1, 0)):
-            nw = dt(1,1)
+            nw = blank_network()
             nw.outgoing = {}
             nw.incoming = {}
             nw._add_segment(((0, 0), (0, 1)))
@@ -50,7 +58,7 @@ class Test_find_endnode(unittest.TestCase):
 
 class Test_check_is_obstacle(unittest.TestCase):
     def test_not_obstacle(self):
-        temp = dt(1,1)  # Create an instance of the class
+        temp = blank_network()  # Create an empty instance of the class
         temp.blocked_nodes.add((0, 0))
         temp.blocked_nodes.add((1, 2))
         result = temp._node_is_obstacle((0, 1))  # Pass both arguments
@@ -59,7 +67,7 @@ class Test_check_is_obstacle(unittest.TestCase):
         
     def test_check_is_obstacle(self):
         node = (0, 1)
-        temp = dt(1,1)
+        temp = blank_network()
         temp.blocked_nodes.add((0, 1))
         result = temp._node_is_obstacle(node)
         self.assertEqual(result,True)
@@ -72,7 +80,7 @@ class Test_check_available_directions(unittest.TestCase):
                         (0, 1): [((0, -1), (0, 0))],
                         (0, -1): [((0, 1), (0, 0))],
                         (1, 0): [((0, 0), (1, 0))]}
-        nw = dt(1,1)
+        nw = blank_network()
         nw.outgoing = road_network
         result = nw._get_available_directions(start_node)
         self.assertEqual(result, [])
@@ -80,7 +88,7 @@ class Test_check_available_directions(unittest.TestCase):
     def test_no_directions_due_to_obstacle(self):
         """Node is blocked by an obstacle, expects empty list"""
         node = (0, 0)
-        dt_instance = dt(1,1)
+        dt_instance = blank_network()
         for element in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
             dt_instance.blocked_nodes.add(element)
 
@@ -91,7 +99,7 @@ class Test_check_available_directions(unittest.TestCase):
 class Test_upscale_road_network(unittest.TestCase):
     def test_upscale_road_network(self):
         initial_segments = [((0, 0), (0, 1)), ((0, 1), (0, 2))]
-        road_network = dt(1,1)
+        road_network = blank_network()
         road_network.outgoing = {}
         road_network.incoming = {}
         for segment in initial_segments:
@@ -103,7 +111,7 @@ class Test_upscale_road_network(unittest.TestCase):
 
     def test_upscales_incoming(self):
         initial_segments = [((0, 0), (0, 1)), ((0, 1), (0, 2))]
-        road_network = dt(1,3)
+        road_network = blank_network()
         road_network.outgoing = {}
         road_network.incoming = {}
         for segment in initial_segments:
@@ -115,7 +123,7 @@ class Test_upscale_road_network(unittest.TestCase):
     
 
     def test_float_upscale(self):
-        road_network = dt(1,1)
+        road_network = blank_network()
         road_network.outgoing = {}
         road_network.incoming = {}
 
@@ -126,7 +134,7 @@ class Test_upscale_road_network(unittest.TestCase):
             road_network._upscale_road_network(3.5)
     
     def test_negative_upscale(self):
-        road_network = dt(1,1)
+        road_network = blank_network()
         road_network.outgoing = {}
         road_network.incoming = {}
         initial_segments = [((0, 0), (0, 1)), ((0, 1), (0, 2))]
@@ -142,7 +150,7 @@ class Test_upscale_road_network(unittest.TestCase):
             road_network._upscale_road_network(0)
 
     def test_string_upscale(self):
-        road_network = dt(1,1)
+        road_network = blank_network()
         road_network.outgoing = {}
         road_network.incoming = {}
         initial_segments = [((0, 0), (0, 1)), ((0, 1), (0, 2))]
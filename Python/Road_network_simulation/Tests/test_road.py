@@ -17,6 +17,14 @@ class Test_road(unittest.TestCase):
         self.assertFalse(road.has_entry)
         self.assertFalse(road.has_exit)
         self.assertEqual(road.spawn_probability, 0.1)
+
+    def test_axis_scalars(self):
+        road = Road([(20, 10), (20, -30)], (0, -1), 6)
+        self.assertEqual((road.axis, road.sign), (1, -1))
+        self.assertEqual((road.start_s, road.end_s, road.stop_s), (10, -30, -24))
+        self.assertEqual(road.fixed_coord, 20)
+        self.assertEqual(road.position_at(-24), (20, -24))
+        self.assertEqual(road.stop_line, (20, -24))
         
 class Test_generate_car_from_gate(unittest.TestCase):
 
@@ -31,6 +39,14 @@ class Test_generate_car_from_gate(unittest.TestCase):
         road.generate_car_from_gate()
         self.assertEqual(len(road.cars), 2)
     
+    def test_generate_car_with_draw(self):
+        segment = [(0, 0), (0, 7)]
+        road = Road(segment,(0,1), clearance=1,probability=0.5,entry=True)
+        road.generate_car_from_gate(draw=0.75)
+        self.assertEqual(len(road.cars), 0)
+        road.generate_car_from_gate(draw=0.25)
+        self.assertEqual(len(road.cars), 1)
+
     def test_generate_car_no_car_if_no_entry(self):
         segment = [(0, 0), (0, 5)]
         road = Road(segment,(0,1), clearance=1,entry=False)
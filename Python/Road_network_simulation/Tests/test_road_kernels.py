@@ -0,0 +1,16 @@
+from modules._road_kernels import advance_queue
+import numpy as np
+import unittest
+
+
+class Test_advance_queue(unittest.TestCase):
+    def test_free_queue(self):
+        progress = np.array((50, 40, 30), dtype=np.float64)
+        max_speeds = np.array((2, 3, 4), dtype=np.float64)
+        self.assertEqual(advance_queue(progress, max_speeds, 100, 6).tolist(), [52, 43, 34])
+
+    def test_queue_restricted_by_clearance(self):
+        progress = np.array((50, 43, 36), dtype=np.float64)
+        max_speeds = np.array((10, 10, 1), dtype=np.float64)
+        #The first car stops the clearance behind the lead, the second behind the first.
+        self.assertEqual(advance_queue(progress, max_speeds, 58, 6).tolist(), [52, 46, 37])
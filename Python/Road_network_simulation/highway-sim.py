@@ -1,9 +1,7 @@
-import modules.roadnetworkgenerator as rng
 from modules.map_manager import MapManager
-from modules.roadnetworkgenerator import * 
 from modules.validators import Validators
-from SimWindow import SimWindow as ms
 import sys
+from typing import Any, Callable, Optional
 
 
 class Main:
@@ -11,29 +9,54 @@ class Main:
     Main interface for the user to configure and generate road networks.
     Allows users to choose between random and custom road generation,
     set simulation parameters, and handle traffic setup.
+    The settings may instead be given as a config, for scripts and benchmarks that run without a user.
     """
-    def __init__(self):
+    #The clearance is fixed, so the lower bound of the scaling factor and its prompt are fixed as well.
+    CLEARANCE = 6
+    MIN_ROAD_SCALAR = max(CLEARANCE * 2, 20)
+    SCALING_PROMPT = 'Please choose a scaling factor for the road generation (integer), \n' \
+                     f'Lower bound is {MIN_ROAD_SCALAR}'
+    #The options of the prompts, built once.
+    GENERATION_OPTIONS = ['random', 'custom']
+    YES_NO = ['yes', 'no']
+    PATH_PROMPT = 'Please enter the path to the file containing the road segments.'
+
+    def __init__(self, config:Optional[dict]=None):
         """
         Initializes the user interface and handles the initial configuration
         process, including road generation and map manager setup.
+
+        Args:
+            config (dict, optional): The answers to use instead of prompting the user, with the keys
+                                     'generation_type', 'disallow_unreachable_roads', 'spawn_probability',
+                                     'total_segments' and 'scaling_factor' for random generation or 'path' for custom generation,
+                                     and optionally 'show' (bool, default True) to launch the simulation window.
+                                     The values are trusted and are not validated, e.g. {'generation_type': 'random',
+                                     'disallow_unreachable_roads': 'no', 'total_segments': 50, 'scaling_factor': 20,
+                                     'spawn_probability': 0.5, 'show': False}.
+                                     Default is None, in which case every setting is prompted.
+
+        Raises:
+            ValueError: If a setting that is needed is missing from the config.
         """
+        self.config = config
         self.road_network = None
         self.map_manager = None
         self.spawn_probability = None
-        self.clearance = 6
+        self.clearance = Main.CLEARANCE
 
-        options = ['random', 'custom']
-        generation_type = Validators.prompt(
+        generation_type = self._setting(
+            'generation_type',
             validator=Validators.validate_options,
-            prompt=f'Please select the generation type of the roads. \n available options are: {options}.',
-            options=options
+            prompt=f'Please select the generation type of the roads. \n available options are: {Main.GENERATION_OPTIONS}.',
+            options=Main.GENERATION_OPTIONS
         )
 
-        options = ['yes', 'no']
-        disallow_unreachable_roads = Validators.prompt(
+        disallow_unreachable_roads = self._setting(
+            'disallow_unreachable_roads',
             validator=Validators.validate_options,
             prompt='Would you like to disallow unreachable roads? \n Available options are: yes, no.',
-            options=['yes', 'no']
+            options=Main.YES_NO
         )
         
         if disallow_unreachable_roads == 'yes':
@@ -47,7 +70,8 @@ class Main:
         elif generation_type == 'custom':
             self.handle_custom_generation(disallow_unreachable_roads)
 
-        self.spawn_probability = Validators.prompt(
+        self.spawn_probability = self._setting(
+            'spawn_probability',
             Validators.validate_float,
             prompt='Please enter the spawn probability of cars on the roads.\n'
                'Probability must be between 0 and 1.',
@@ -62,9 +86,31 @@ class Main:
             exit_gates=self.road_network.exit_gates,
             probability=self.spawn_probability
         )
-        
-        self.setup_simulation()
-        
+
+        if config is None or config.get('show', True):
+            self.setup_simulation()
+
+    def _setting(self, key:str, validator:Callable, prompt:str, **kwargs:Any)->Any:
+        """
+        Returns a setting from the config, or prompts the user for it if no config is given.
+
+        Args:
+            key (str): The key of the setting in the config.
+            validator (function): The validation function of the prompt.
+            prompt (str): The prompt message to display.
+
+        Returns:
+            Any: The setting.
+
+        Raises:
+            ValueError: If a config is given, but the setting is missing from it.
+        """
+        if self.config is not None:
+            if key not in self.config:
+                raise ValueError(f"The config is missing the setting '{key}'.")
+            return self.config[key]
+        return Validators.prompt(validator, prompt, **kwargs)
+
 
     def handle_random_generation(self, strict_generation:bool)->None:
         """
@@ -80,20 +126,22 @@ class Main:
         Side effects:
             -Modifies self.road_network
         """
+        #The generator and its optional scipy import are loaded once a network is generated, not before the first prompt.
+        from modules import roadnetworkgenerator as rng
         lower_bound = 1
-        total_segments = Validators.prompt(
+        total_segments = self._setting(
+            'total_segments',
             Validators.validate_integer,
             prompt = f'How many roads would you like to generate? \n' \
                     f'At least {lower_bound} roads are required.',
             lower_bound=1
         )
 
-        min_road_scalar = max(self.clearance * 2, 20)
-        scaling_factor = Validators.prompt(
+        scaling_factor = self._setting(
+            'scaling_factor',
             Validators.validate_integer,
-            prompt = 'Please choose a scaling factor for the road generation (integer), \n' \
-                    f'Lower bound is {min_road_scalar}',
-            lower_bound=min_road_scalar
+            prompt = Main.SCALING_PROMPT,
+            lower_bound=Main.MIN_ROAD_SCALAR
         )
 
         self.road_network = rng.RandomRoadNetwork(total_segments, scaling_factor, strict_generation)
@@ -110,14 +158,24 @@ class Main:
         Prompts:
             - File path containing road segments.
         
+        Raises:
+            Exception: If the network of the file in the config is invalid, as there is no user to retry.
+
         Side effects:
             -Modifies self.road_network
         """
+        from modules import roadnetworkgenerator as rng
+        if self.config is not None:
+            path = self._setting('path', Validators.validate_path, prompt=Main.PATH_PROMPT)
+            segments = Validators.extract_file_data(path)
+            self.road_network = rng.CustomRoadNetwork(segments, strict_generation)
+            return
+
         while True:
             try:
                 path = Validators.prompt(
                     Validators.validate_path,
-                    prompt='Please enter the path to the file containing the road segments.'
+                    prompt=Main.PATH_PROMPT
                 )
                 segments = Validators.extract_file_data(path)
                 self.road_network = rng.CustomRoadNetwork(segments, strict_generation)
@@ -127,19 +185,21 @@ class Main:
                 retry = Validators.prompt(
                     Validators.validate_options,
                     prompt='Would you like to retry custom generation?',
-                    options=['yes', 'no']
+                    options=Main.YES_NO
                 )
+                #Retries stay in the loop, so the stack does not grow with every failed attempt.
                 if retry == 'yes':
-                    self.handle_custom_generation(strict_generation)
-                else:
-                    print('Exiting program.')
-                    sys.exit()
+                    continue
+                print('Exiting program.')
+                sys.exit()
 
 
     def setup_simulation(self):
         """
         Sets up and launches the simulation window using the generated road network and map manager.
         """
+        #dearpygui is only loaded when the window is shown.
+        from SimWindow import SimWindow as ms
         window = ms()
         window.set_roads(self.road_network.convert_to_segments())
         window.set_in_gates(self.road_network.entry_gates)
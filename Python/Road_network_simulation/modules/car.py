@@ -1,6 +1,7 @@
 import numpy as np
 from numpy.typing import NDArray
 import random
+from typing import Optional
 
 from modules.custom_types import *
 
@@ -11,9 +12,15 @@ class Car:
     Class methods:
         move(position): Moves the car to a new position.
     """
+    #Fixed attribute slots, so the attributes read on every tick are loaded without an instance dict.
+    __slots__ = ('ID', 'color', 'max_speed', 'position')
+
     generation_count = 1
 
-    def __init__(self, position: Node, speed_range: Tuple[float, float] = (0.7, 1.3)) -> None:
+    #Default range of the maximum speeds, also used by callers that sample the speeds themselves.
+    SPEED_RANGE = (0.7, 1.3)
+
+    def __init__(self, position: Node, speed_range: Tuple[float, float] = SPEED_RANGE, color: Optional[RGB] = None, max_speed: Optional[float] = None) -> None:
         """
         Generates the properties of a car objects, which includes an ID, color, position, and maximum speed.
 
@@ -21,12 +28,17 @@ class Car:
             position (Node): The position of the car.
             speed_range (Tuple[float,float]): Optional to override the range of speeds that the car can travel at.
             Default range is [0.7,1.3].
+            color (Optional[RGB]): The color of the car. Default is None, in which case it is drawn from the random module.
+            max_speed (Optional[float]): The maximum speed of the car. Default is None, in which case it is drawn
+                                         from the random module within speed_range.
         """
        
         self.ID = Car.generation_count
-        self.color = tuple(random.choices(range(256),k=3))
-        self.max_speed =  random.uniform(speed_range[0],speed_range[1])
-        self.position = np.array(position)
+        self.color = tuple(random.choices(range(256),k=3)) if color is None else color
+        self.max_speed = random.uniform(speed_range[0],speed_range[1]) if max_speed is None else max_speed
+        #Stored as a pair of floats, so no array is allocated per car.
+        #Double precision is required: a car leaves a road when its position equals the endnode exactly.
+        self.position = (float(position[0]), float(position[1]))
   
         Car.generation_count += 1
 
@@ -34,10 +46,14 @@ class Car:
         """
         Moves the car to a new position.
         Args:
-            position (NDArray[np.float64]): The new position of the car. 
+            position (NDArray[np.float64]): The new position of the car, or a pair of floats as returned by Road.position_at.
                 Due to the nature of the simulation, the dimension of the position is 2.
         
         Side effects:
-            Changes the position of the car to the new position.
+            Changes the position of the car to the new position, stored as a pair of floats.
         """
-        self.position = position
+        #Tuples come from Road.position_at and already hold floats, so they are stored without conversion.
+        if type(position) is tuple:
+            self.position = position
+        else:
+            self.position = (float(position[0]), float(position[1]))
@@ -1,8 +1,9 @@
+import math
 import numpy as np
 import random
 from modules.car import Car
 from modules.road import Road
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 
 class Intersection:
@@ -21,18 +22,26 @@ class Intersection:
         can_approach(car) -> bool: Determines if a car can approach the intersection.
         find_available_road() -> Optional[Road]: Finds the next road that a car can move to.
     """
-    def __init__(self, position: Tuple[float, float], clearance: float)->None:
+    def __init__(self, position: Tuple[float, float], clearance: float, rng: Optional[np.random.Generator] = None)->None:
         """
         Initializes the intersection with a position and empty lists of incoming and outgoing roads.
         
         Args:
             position: Tuple[float,float] - The position of the intersection.
             clearance: float - The minimum distance a car must be from the intersection for another to move into the intersection.
+            rng: Optional[np.random.Generator] - The generator of the random road choice, e.g. the one of the map,
+                 so a seeded map is reproducible. Default is None, in which case the random module is used.
         """
         self.position = np.array(position)
+        #Scalar coordinates of the position for the distance computations.
+        self._x, self._y = float(position[0]), float(position[1])
         self.incoming_roads = []
         self.outgoing_roads = []
         self.min_clearance = clearance
+        #The clearance is only compared with squared distances.
+        self._min_clearance_sq = clearance * clearance
+        #Both return a float in [0,1) per call.
+        self._random = random.random if rng is None else rng.random
     
     def add_incoming_road(self, road: Road)->None:
         """
@@ -82,12 +91,21 @@ class Intersection:
             float: The distance between the intersection and the car.
 
         Raises:
-            TypeError: If the car is not of type Car.
+            TypeError: If the car is not of type Car (not checked under python -O).
         """
-        if not isinstance(car, Car):
-            raise TypeError("Car must be of type Car.")
+        if __debug__:
+            if not isinstance(car, Car):
+                raise TypeError("Car must be of type Car.")
         
-        return np.linalg.norm(car.position - self.position)
+        return math.sqrt(self._dist_sq(car))
+
+    def _dist_sq(self, car: Car) -> float:
+        """
+        Calculates the squared Euclidean distance between the intersection and a car, using scalar operations.
+        """
+        dx = car.position[0] - self._x
+        dy = car.position[1] - self._y
+        return float(dx*dx + dy*dy)
     
     def closest_incoming_car(self, priority_car: Car) -> Car:
         """
@@ -101,23 +119,17 @@ class Intersection:
             Car: The closest car to the intersection.
 
         Raises:
-            TypeError: If the priority car is not of type Car.
+            TypeError: If the priority car is not of type Car (not checked under python -O).
         """
-        if not isinstance(priority_car, Car):
-            raise TypeError("Car must be of type Car.")
+        if __debug__:
+            if not isinstance(priority_car, Car):
+                raise TypeError("Car must be of type Car.")
         
-        closest_car = priority_car
-        min_distance = self.distance_to_car(priority_car)
+        #car[0] is the first car in the deque, the priority car is placed first so it wins ties
+        cars = [priority_car] + [road.cars[0] for road in self.incoming_roads if road.cars]
+        index, _ = self._closest_car(cars)
 
-        for road in self.incoming_roads:
-            if road.cars:
-                #car[0] is the first car in the deque
-                distance = self.distance_to_car(road.cars[0])
-                if distance < min_distance:
-                    closest_car = road.cars[0]
-                    min_distance = distance
-
-        return closest_car
+        return cars[index]
     
     def closest_outgoing_car(self) -> Optional[Car]:
         """
@@ -127,18 +139,34 @@ class Intersection:
             Car: The closest car to the intersection.
             None: If there are no cars in the outgoing roads.
         """
-        closest_car = None
-        min_distance = float('inf')
+        #Car that is the last on the road
+        cars = [road.cars[-1] for road in self.outgoing_roads if road.cars]
+        if not cars:
+            return None
 
-        for road in self.outgoing_roads:
-            if road.cars:
-                #Car that is the last on the road
-                distance = self.distance_to_car(road.cars[-1])
-                if not closest_car or distance < min_distance:
-                    closest_car = road.cars[-1]
-                    min_distance = distance
-                    
-        return closest_car
+        index, _ = self._closest_car(cars)
+        return cars[index]
+
+    def _closest_car(self, cars: List[Car]) -> Tuple[int, float]:
+        """
+        Computes the squared distances from the intersection to all the given cars at once
+        and finds the closest one. If several cars are equally close, the first one is chosen.
+
+        Args:
+            cars: List[Car] - A non-empty list of cars.
+
+        Returns:
+            Tuple[int,float]: The index of the closest car and its squared distance.
+        """
+        #Most intersections only have a single candidate, which needs no array at all.
+        if len(cars) == 1:
+            return 0, self._dist_sq(cars[0])
+
+        diff = np.array([car.position for car in cars], dtype=np.float64) - self.position
+        distances_sq = np.einsum('ij,ij->i', diff, diff)
+        #argmin keeps the first of equal minima.
+        index = int(distances_sq.argmin())
+        return index, float(distances_sq[index])
 
     def can_approach(self, car: Car) -> bool:
         """
@@ -153,21 +181,29 @@ class Intersection:
             bool: True if the car can approach the intersection, False otherwise.
             
         Raises:
-            TypeError: If the car is not of type Car.
+            TypeError: If the car is not of type Car (not checked under python -O).
         """
 
-        if not isinstance(car, Car):
-            raise TypeError("Car must be of type Car.")
+        if __debug__:
+            if not isinstance(car, Car):
+                raise TypeError("Car must be of type Car.")
 
-        closest_car = self.closest_outgoing_car()
+        #Both conditions are checked in a single pass over the front cars with squared distances,
+        #returning as soon as one of them fails, instead of finding the closest cars first.
 
         #If there is a car on an outgoing road, and it has not left the intersection, disallow the car from approaching.
-        if closest_car and self.distance_to_car(closest_car) < self.min_clearance:
-            return False
+        for road in self.outgoing_roads:
+            cars = road.cars
+            if cars and self._dist_sq(cars[-1]) < self._min_clearance_sq:
+                return False
         
         #If another car is already approaching the intersection disallow the car from moving.
-        elif car != self.closest_incoming_car(car):
-            return False
+        #The car itself wins ties, as in closest_incoming_car.
+        car_distance_sq = self._dist_sq(car)
+        for road in self.incoming_roads:
+            cars = road.cars
+            if cars and self._dist_sq(cars[0]) < car_distance_sq:
+                return False
         
         return True
 
@@ -184,14 +220,23 @@ class Intersection:
             Road: A random road that the car can move to.
             None: If there are no available roads.
         """
-        available_roads = []
+        chosen_road = None
+        available = 0
+        draw = self._random
+        #Multiplied by two, as it needs to be able to itself move the clearence distance from the intersection
+        min_distance = self.min_clearance * 2
 
         for road in self.outgoing_roads:
-            if not road.cars:
-                available_roads.append(road)
-            else:
-                #Multiplied by two, as it needs to be able to itself move the clearence distance from the intersection
-                if np.linalg.norm(road.cars[-1].position - self.position) >= (self.min_clearance * 2):
-                    available_roads.append(road)
-
-        return random.choice(available_roads) if available_roads else None
+            cars = road.cars
+            if cars:
+                #The last car is on the road, so its distance is how far it got along the road from its startnode at the intersection.
+                if road.sign * (cars[-1].position[road.axis] - road.start_s) < min_distance:
+                    continue
+
+            #Reservoir sampling, the n-th available road replaces the choice with probability 1/n,
+            #which picks every available road with the same probability in a single pass.
+            available += 1
+            if draw() * available < 1:
+                chosen_road = road
+
+        return chosen_road
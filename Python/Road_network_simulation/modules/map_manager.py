@@ -1,10 +1,13 @@
 import random
+from itertools import islice
 import numpy as np
 from modules.road import Road
 from modules.intersection import Intersection
 from modules.car import Car
+from modules._road_kernels import COMPILED, advance_queue
 from modules.custom_types import *
-from typing import List
+from typing import List, Optional
+from collections import deque
 
 class MapManager:
     """
@@ -18,6 +21,7 @@ class MapManager:
         move_cars(): Moves the cars along the roads.
         handle_exit(car, road, intersection): Handles specific car movement at the end of roads.
         max_speed(car, car_in_front, road): Returns the maximum speed the car may move during the given iteration. 
+        advance(car, car_in_front, road, intersection): Returns the coordinate a car moves to, or None at a closed stop line.
         generate_cars(): Attempts to generate cars from the roads with entry gates.
         update_car(car_positions, car_colors): Updates car positions and car colors and returns these values.
 
@@ -40,7 +44,15 @@ class MapManager:
           and the intersection must be strictly less than the distance in "Intersection.find available road".
     """
 
-    def __init__(self, road_network: Graph, entry_gates: List[Node], exit_gates: List[Node], probability: float = 0.05, clearance: float = 6) -> None:
+    #Queues of more than this many cars are moved with a single pass of advance_queue.
+    #Without numba the pass is a Python loop, which only beats moving the cars one by one from about 24 cars.
+    _SINGLE_PASS_QUEUE = 8 if COMPILED else 32
+    #Number of cycles of spawn draws sampled at once for the entry roads.
+    _DRAW_BLOCK = 256
+    #Number of car colors and speeds sampled at once.
+    _CAR_BLOCK = 1024
+
+    def __init__(self, road_network: Graph, entry_gates: List[Node], exit_gates: List[Node], probability: float = 0.05, clearance: float = 6, seed: Optional[int] = None) -> None:
         """
         Initializes the map manager object.
     
@@ -51,6 +63,8 @@ class MapManager:
             probability (float): The probability of a car being generated at an entry gate. Default is 0.05.
             clearance (float): The minimum distance between two cars and distance from any outgoing car and the intersection.
                                Setting clearance to less than 6 will cause car collisions.
+            seed (Optional[int]): Seed of the generator for the order of the roads, the spawns and the properties of the cars. 
+                                  Default is None, in which case the seed is drawn from the random module.
 
         Raises:
             ValueError: If the probability is not between 0 and 1.
@@ -65,6 +79,11 @@ class MapManager:
         self.entry_roads = []
         self.intersections = []
         self.min_clearance = clearance
+        #A single generator for the randomness of the map, seeded from the random module unless a seed is given.
+        self._rng = np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+        self._spawn_draws = []
+        self._car_colors = []
+        self._car_speeds = []
 
         if probability < 0 or probability > 1:
             raise ValueError("Probability must be between 0 and 1.")
@@ -80,6 +99,12 @@ class MapManager:
         
         self._generate_intersections(road_network)
 
+        #The clearance as a float for the hot path, it does not change once the roads are built.
+        self._clearance = float(self.min_clearance)
+
+        #The order the roads are moved in, shuffled in place every cycle instead of shuffling a new copy.
+        self._road_order = self.roads.copy()
+
     def _validate_roads(self) -> bool:
         """
         Validates that the shortest road in the simulation is at least 2x the minimum clearance.
@@ -90,7 +115,7 @@ class MapManager:
         """
         min_length = 2 * self.min_clearance
         for road in self.roads:
-            if np.linalg.norm(road.endnode - road.startnode) < min_length:
+            if road.length < min_length:
                 return False
             elif not (road.direction[0] == 0 or road.direction[1] == 0):
                 return False
@@ -117,11 +142,14 @@ class MapManager:
         if probability < 0 or probability > 1:
             raise ValueError("Probability must be between 0 and 1.")
         
-        
+        #Sets of the gates, so each edge is matched in O(1). Duplicate gates collapse into one.
+        entry_set = {tuple(node) for node in entry_gates}
+        exit_set = {tuple(node) for node in exit_gates}
+
         for startnode in road_network:
            for direction, endnode in road_network[startnode]:
-                entry = startnode in entry_gates
-                exit = endnode in exit_gates
+                entry = tuple(startnode) in entry_set
+                exit = tuple(endnode) in exit_set
                 road = Road((startnode, endnode),direction,self.min_clearance, probability, entry, exit)
                 
                 self.roads.append(road)
@@ -146,21 +174,23 @@ class MapManager:
             Roads are given a reference to their respective outgoing intersection.
         """
     
+        #Index of the intersections by their node, so each road finds its intersections in O(1).
+        self._intersection_index = {}
         for node in road_network:
-                intersection = Intersection(node, clearance=self.min_clearance) 
+                intersection = Intersection(node, clearance=self.min_clearance, rng=self._rng)
                 self.intersections.append(intersection)
+                self._intersection_index[tuple(node)] = intersection
         
-        #This line runs in O(n*m) time, but the number of intersections is expected to be small.
-        #Could be optimized but since it's only run once, it's not a priority.
+        #The scalar endpoints of the roads hash equal to the nodes, as equal ints and floats share their hash.
         for road in self.roads:
-            for intersection in self.intersections:
-
-                if np.array_equal(road.endnode, intersection.position):
-                    intersection.add_incoming_road(road)
-                    road.connected_intersection = intersection
+            intersection = self._intersection_index.get(road.end_xy)
+            if intersection is not None:
+                intersection.add_incoming_road(road)
+                road.connected_intersection = intersection
 
-                if np.array_equal(road.startnode, intersection.position):
-                    intersection.add_outgoing_road(road)
+            intersection = self._intersection_index.get(road.start_xy)
+            if intersection is not None:
+                intersection.add_outgoing_road(road)
 
     def move_cars(self) -> None:
         """
@@ -174,30 +204,131 @@ class MapManager:
         """
 
         #Shuffle the roads, so that priority in intersections is randomized between iterations.
-        road_copy = self.roads.copy()
-        random.shuffle(road_copy)
+        road_order = self._road_order
+        self._rng.shuffle(road_order)
+
+        #Bind the names used for every car once, instead of resolving them per car.
+        move_car = self._move_car
+        move_queue = self._move_queue
+        handle_exit = self._handle_exit
+        single_pass_queue = self._SINGLE_PASS_QUEUE
+
+        for road in road_order:
+            cars = road.cars
+            #Most roads of a network are empty at any time, they need no further work.
+            if not cars:
+                continue
 
-        for road in road_copy:
             intersection = road.connected_intersection
-            #While this copies the cars, the list still references to the same objects.
-            cars = road.cars.copy()
-            for i, car in enumerate(cars):
-                car_in_front = cars[i - 1] if i > 0 else None
-
-                #Calculate the maximum speed the car may move at and the position it would move to.
-                max_speed = self._max_speed(car, car_in_front,road)
-                max_position = car.position + (road.direction * max_speed)
-                
-                #If the car would cross the stopping line, ensure that it may approach the intersection otherwise stop at the stopping line.
-                if road.distance_to_endnode(max_position) <= self.min_clearance and not intersection.can_approach(car):
-                        car.move(road.stop_line)
-                else:
-                    car.move(max_position)
+            #Only the first car can reach the endnode, and on most roads it is the only car.
+            car_in_front = cars[0]
+            at_end = move_car(car_in_front, None, road, intersection)
+
+            #A long queue behind the first car is moved in one pass if possible, otherwise car by car.
+            n = len(cars)
+            if n > 1 and not (n > single_pass_queue and move_queue(road, cars)):
+                #The previous car of the loop is the car in front, which avoids indexing into the deque.
+                for car in islice(cars, 1, None):
+                    move_car(car, car_in_front, road, intersection)
+                    car_in_front = car
+
+            #The deque is iterated without a copy, so the first car may only leave the road after the loop.
+            if at_end:
+                handle_exit(road, intersection)
+
+    def _move_car(self, car: Car, car_in_front: Car, road: Road, intersection: Intersection) -> bool:
+        """
+        Moves a single car along its road, the car in front has already moved.
+
+        Args:
+            car (Car): The car of the current cycle.
+            car_in_front (Car): The car in front of the current car, None for the first car.
+            road (Road): The road of the current cycle.
+            intersection (Intersection): The intersection at the end of the road.
+
+        Returns:
+            bool: True if the car reached the endnode and must be handled by _handle_exit, otherwise False.
 
-                    #This can only occur if the car is the first car in the deque.
-                    if np.array_equal(car.position, road.endnode):
-                        self._handle_exit(road, intersection)
+        Side effects:
+            Mutates the position of the car.
+        """
+        new_s = self._advance(car, car_in_front, road, intersection)
+        if new_s is None:
+            car.move(road.stop_line)
+            return False
+
+        car.move(road.position_at(new_s))
+        #The other coordinate is fixed along the road, so comparing the coordinate on the axis is enough.
+        return new_s == road.end_s
+
+    def _advance(self, car: Car, car_in_front: Car, road: Road, intersection: Intersection) -> Optional[float]:
+        """
+        Computes where a car moves to in a single pass over its coordinate along the road.
+        The car moves as in _max_speed, limited by its maximum speed, the car in front and the end of the road.
+        If the new position is within the clearance of the endnode, the intersection must allow the car to approach.
+
+        Args:
+            car (Car): The car of the current cycle.
+            car_in_front (Car): The car in front of the current car, None for the first car.
+            road (Road): The road of the current cycle.
+            intersection (Intersection): The intersection at the end of the road.
+
+        Returns:
+            Optional[float]: The new coordinate of the car along the axis of the road, or None if the car must stop at the stop line.
+        """
+        axis = road.axis
+        end_s = road.end_s
+        clearance = self._clearance
+        s = car.position[axis]
+        dist_to_end = abs(end_s - s)
+
+        if car_in_front:
+            #safety check to ensure that the car does not move backwards.
+            movement = max(0, min(abs(car_in_front.position[axis] - s) - clearance, car.max_speed))
+            movement = min(dist_to_end, movement)
+        else:
+            movement = min(dist_to_end, car.max_speed)
+        new_s = s + road.sign * movement
 
+        #If the car would cross the stopping line, ensure that it may approach the intersection otherwise stop at the stopping line.
+        #The distance of new_s is computed here rather than taken as dist_to_end - movement, which may round differently.
+        #Cars do not pass the endnode, so the signed distance along the road needs no abs.
+        if road.sign * (end_s - new_s) <= clearance and not intersection.can_approach(car):
+            return None
+        return new_s
+
+    def _move_queue(self, road: Road, cars: deque) -> bool:
+        """
+        Moves all cars behind the first car of a road in a single pass of advance_queue,
+        which is compiled with numba when it is available and a Python loop otherwise.
+        The pass is only used if it matches moving the cars one by one: every car keeps at least the clearance
+        to the car in front, and no car gets within the clearance of the endnode, where the intersection decides.
+
+        Args:
+            road (Road): The road of the current cycle.
+            cars (deque): The cars of the road, where the first car has already moved.
+
+        Returns:
+            bool: True if the cars were moved, False if they must be moved one by one.
+
+        Side effects:
+            Mutates the positions of the cars behind the first car, if True is returned.
+        """
+        axis, sign = road.axis, road.sign
+        queue = list(islice(cars, 1, None))
+        #The deque holds Car objects, so the contiguous arrays are filled with a known length in one go.
+        n = len(queue)
+        progress = sign * np.fromiter([car.position[axis] for car in queue], np.float64, n)
+        max_speeds = np.fromiter([car.max_speed for car in queue], np.float64, n)
+
+        clearance = self._clearance
+        moved = advance_queue(progress, max_speeds, sign * cars[0].position[axis], clearance)
+        if (moved < progress).any() or sign * road.end_s - moved[0] <= clearance:
+            return False
+
+        for car, s in zip(queue, (sign * moved).tolist()):
+            car.move(road.position_at(s))
+        return True
                 
     def _handle_exit(self, road: Road, intersection: Intersection) -> None:
         """
@@ -235,10 +366,12 @@ class MapManager:
         Returns:
             float: The maximum speed the car may move at.
         """
-        dist_to_end = np.linalg.norm(road.endnode - car.position)
+        #Cars on a road share the fixed coordinate, so distances are differences along the axis of the road.
+        axis = road.axis
+        dist_to_end = abs(road.end_s - car.position[axis])
 
         if car_in_front:
-            dist_to_car_infront = np.linalg.norm(car_in_front.position - car.position)
+            dist_to_car_infront = abs(car_in_front.position[axis] - car.position[axis])
             max_movement = min(dist_to_car_infront - self.min_clearance, car.max_speed)
             
             #safety check to ensure that the car does not move backwards.
@@ -253,9 +386,51 @@ class MapManager:
 
         Side effects:
             Adds a car to the end of a road deque, if a spawn is valid.
+            Refills the block of spawn draws, when it is empty.
+        """
+        if not self._spawn_draws:
+            self._refill_spawn_draws()
+
+        new_car = self._new_car
+        for road, draw in zip(self.entry_roads, self._spawn_draws.pop()):
+                road.generate_car_from_gate(draw, new_car)
+
+    def _new_car(self, position: Node) -> Car:
+        """
+        Creates a car at a position, with the next color and maximum speed of the blocks sampled from the generator of the map.
+
+        Args:
+            position (Node): The position of the car.
+
+        Returns:
+            Car: The new car.
+
+        Side effects:
+            Refills the blocks of colors and speeds, when they are empty.
+        """
+        if not self._car_colors:
+            self._refill_car_properties()
+        return Car(position, color=self._car_colors.pop(), max_speed=self._car_speeds.pop())
+
+    def _refill_car_properties(self) -> None:
+        """
+        Samples the colors and maximum speeds of a block of cars with a single vectorized call each.
+
+        Side effects:
+            Replaces the blocks of car colors and speeds.
+        """
+        low, high = Car.SPEED_RANGE
+        self._car_colors = [tuple(color) for color in self._rng.integers(0, 256, size=(self._CAR_BLOCK, 3)).tolist()]
+        self._car_speeds = self._rng.uniform(low, high, self._CAR_BLOCK).tolist()
+
+    def _refill_spawn_draws(self) -> None:
+        """
+        Samples the spawn draws of the entry roads for a block of cycles with a single vectorized call.
+
+        Side effects:
+            Replaces the block of spawn draws, one list of draws per cycle.
         """
-        for road in self.entry_roads:
-                road.generate_car_from_gate()
+        self._spawn_draws = self._rng.random((self._DRAW_BLOCK, len(self.entry_roads))).tolist()
     
     def update_car(self, car_positions: Position, car_colors: RGB) -> Tuple[List[Position], List[RGB]]:
         """
@@ -274,9 +449,10 @@ class MapManager:
         self.move_cars()
         self.generate_cars()
 
+        #Positions are already stored as tuples by the cars, so they are passed on without a copy.
         for road in self.roads:
-            for car in road.cars:
-                car_positions.append(tuple(car.position))
-                car_colors.append(car.color)
+            cars = road.cars
+            car_positions.extend([car.position for car in cars])
+            car_colors.extend([car.color for car in cars])
     
         return car_positions, car_colors
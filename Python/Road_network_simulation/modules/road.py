@@ -1,8 +1,10 @@
+import math
 import random
 import numpy as np
 from numpy.typing import NDArray
 from modules.custom_types import *
 from collections import deque
+from typing import Callable, Optional
 from modules.car import Car
 
 class Road:
@@ -15,8 +17,9 @@ class Road:
     Class methods:
         add_car(car) -> None: Adds a car to the end of the deque.
         remove_first_car() -> None: Removes the front most car in the deque.
-        generate_car_from_gate() -> None: If the road has an entry gate, generates a car at the end of the deque.
-        distance_to_endnode(position) -> float: Calculates the distance between a point and the the endnode.
+        generate_car_from_gate(draw, new_car) -> None: If the road has an entry gate, generates a car at the end of the deque.
+        distance_to_endnode(position) -> float: Calculates the distance along the road between a point and the the endnode.
+        position_at(s) -> Position: Returns the point of the road with the coordinate s along its axis.
     """
 
     def __init__(self, segment: Segment, direction: Unit_Vector, clearance: float, probability: float = 1, entry: bool = False, exit: bool = False,) -> None:
@@ -37,15 +40,32 @@ class Road:
         if clearance <= 0:
             raise ValueError("Clearance must be positive.")
         
-        if np.linalg.norm(np.array(segment[1]) - np.array(segment[0])) <= clearance:
+        (x1, y1), (x2, y2) = segment
+        #The length is computed once from the scalar coordinates, without temporary arrays.
+        length = math.hypot(x2 - x1, y2 - y1)
+        if length <= clearance:
             raise ValueError("Clearance must be less than the length of the road.")
         
         self.startnode = np.array(segment[0])
         self.endnode = np.array(segment[1])
 
-        if np.linalg.norm(self.endnode - self.startnode) == 0:
+        if length == 0:
             raise ValueError("Road must have a length greater than 0.")
         
+        #Unit vector along the segment itself, which gives the axis and the direction of travel.
+        unit_tangent = (float((x2 - x1) / length), float((y2 - y1) / length))
+        #Scalar copies of the endpoints for distance computations on the hot path.
+        self.start_xy = (float(self.startnode[0]), float(self.startnode[1]))
+        self.end_xy = (float(self.endnode[0]), float(self.endnode[1]))
+        self.length = length
+
+        #Roads are horizontal or vertical, so a position along the road is the single coordinate on its axis.
+        self.axis = 0 if unit_tangent[1] == 0 else 1
+        self.sign = 1.0 if unit_tangent[self.axis] > 0 else -1.0
+        self.start_s = self.start_xy[self.axis]
+        self.end_s = self.end_xy[self.axis]
+        #The other coordinate is the same for every point of the road.
+        self.fixed_coord = self.start_xy[1 - self.axis]
         self.direction =  np.array(direction)
         self.spawn_probability = probability
         self.has_entry = entry
@@ -53,7 +73,10 @@ class Road:
         self.connected_intersection = None
         self.cars = deque()
         self.clearance = clearance
-        self.stop_line = self.endnode - (self.clearance * self.direction)
+        #The coordinate of the stop line along the axis, taken from the geometry like the other scalars.
+        self.stop_s = self.end_s - self.sign * self.clearance
+        #The stop line as a pair of floats, which cars store as their position without conversion.
+        self.stop_line = self.position_at(self.stop_s)
 
         
 
@@ -78,29 +101,48 @@ class Road:
         """
         return self.cars.popleft()
 
-    def generate_car_from_gate(self) -> None:
+    def generate_car_from_gate(self, draw: Optional[float] = None, new_car: Optional[Callable[[Node], Car]] = None) -> None:
         """
         If the road has an entry gate and there is no car occupying the spawn point,
         generate a car with a given probability.
 
+        Args:
+            draw (Optional[float]): A uniform sample in [0,1) compared with the spawn probability.
+                                    Default is None, in which case a sample is drawn from the random module.
+            new_car (Optional[Callable[[Node],Car]]): Creates the car at the given position, only called if a car spawns.
+                                                      Default is None, in which case Car draws its own properties.
+
         Side effects:
             Adds a car to the end of the deque.
         """
 
         #If the road is an entry road, and the car either has no road, or the closest car is far enough from the spawn point
-        if self.has_entry and (not self.cars or np.linalg.norm(self.cars[-1].position - self.startnode) >= self.clearance):
-            if random.random() <= self.spawn_probability:
-                self.cars.append(Car(position=self.startnode))
+        if self.has_entry and (not self.cars or abs(self.cars[-1].position[self.axis] - self.start_s) >= self.clearance):
+            if (random.random() if draw is None else draw) <= self.spawn_probability:
+                self.cars.append(Car(position=self.startnode) if new_car is None else new_car(self.startnode))
 
-    def distance_to_endnode(self, position: NDArray[np.float64]) -> float:
+    def distance_to_endnode(self, position: Position) -> float:
         """
-        Calculates the Euclidean distance between a point and the endnode.
+        Calculates the distance between a point on the road and the endnode.
+        As roads are horizontal or vertical, this is the difference of the coordinates along the axis of the road.
 
         Args:
-            position (NDArray[np.float64]): The position of a car.
+            position (Position): The position of a car on the road, any pair of coordinates.
             
         Returns:
             float: The distance between the car and the endnode.
         """
-        return np.linalg.norm(position - self.endnode)
-                                 
+        return abs(self.end_s - position[self.axis])
+
+
+    def position_at(self, s: float) -> Position:
+        """
+        Returns the point of the road, whose coordinate along the axis of the road is s.
+
+        Args:
+            s (float): The coordinate along the axis of the road.
+
+        Returns:
+            Position: The point as a pair of floats.
+        """
+        return (s, self.fixed_coord) if self.axis == 0 else (self.fixed_coord, s)
@@ -3,6 +3,20 @@ from modules.loggers import *
 from modules.utils import Utils as utils
 import numpy as np
 import random
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict, deque
+from typing import Iterable, Iterator, Optional
+
+#scipy is optional, the connectivity check falls back to a pure Python search when it is not installed.
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import connected_components
+except ImportError:
+    csr_matrix = None
+
+#Up to this many pairs of horizontal and vertical segments, the intersection check compares all pairs at once.
+_BROADCAST_PAIRS = 50000
+
 
 class AsymmetricRoadNetwork():
     """
@@ -96,11 +110,17 @@ class AsymmetricRoadNetwork():
         Returns:
             List[Segment]: A list of segments where each segment is a tuple of two points ((x1, y1), (x2, y2)).
         """
-        segments = []
-        for startnode in self.outgoing:
-            for _, endnode in self.outgoing[startnode]:
-                segments.append((startnode, endnode))
-        return segments
+        return list(self._iter_segments())
+
+    def _iter_segments(self) -> Iterator[Segment]:
+        """
+        Yields the segments of the road network, in the same order as convert_to_segments.
+
+        Returns:
+            Iterator[Segment]: The segments, each a tuple of two points ((x1, y1), (x2, y2)).
+        """
+        #A single pass over the adjacency lists, without looking each node up again.
+        return ((startnode, endnode) for startnode, edges in self.outgoing.items() for _, endnode in edges)
 
     @staticmethod
     def get_unit_vector(segment: Segment) -> Unit_Vector:
@@ -120,16 +140,18 @@ class AsymmetricRoadNetwork():
             raise ValueError("Segment is empty")
         (x1, y1), (x2, y2) = segment
 
-        vector = np.array([x2-x1,y2-y1])
-        norm = np.linalg.norm(vector)
-
-        if norm == 0:
+        #The coordinates are compared before any arithmetic, as the invalid segments are rejected by the comparisons alone.
+        same_x = x1 == x2
+        same_y = y1 == y2
+        if same_x and same_y:
             raise ValueError("Segments with no direction are disallowed")
-        if x1 != x2 and y1 != y2:
+        if not same_x and not same_y:
             raise ValueError("Diagonal segments are disallowed")
 
-        unit_vector = tuple((vector / norm).tolist())
-        return unit_vector
+        #Segments are cardinal, so the unit vector follows from comparing the coordinates that differ.
+        if same_x:
+            return (0.0, 1.0 if y2 > y1 else -1.0)
+        return (1.0 if x2 > x1 else -1.0, 0.0)
     
     def search_for_invalid_intersections(self) -> None:
         """
@@ -143,14 +165,17 @@ class AsymmetricRoadNetwork():
             ValueError: If an intersection has no entrance or exit.
         """
 
+        #Only the emptiness of the adjacency lists matters, and the gates are looked up in sets.
+        exit_gates, entry_gates = set(self.exit_gates), set(self.entry_gates)
+
         #Search for intersection with no exit
-        for node in self.outgoing:
-            if self.outgoing[node] == [] and node not in self.exit_gates:
+        for node, edges in self.outgoing.items():
+            if not edges and node not in exit_gates:
                 raise ValueError(f"intersection at {node} has no exit")
         
         #Search for intersection with no entrance
-        for node in self.incoming:
-            if self.incoming[node] == [] and node not in self.entry_gates:
+        for node, startnodes in self.incoming.items():
+            if not startnodes and node not in entry_gates:
                 raise ValueError(f"intersection at {node} has no entrance")
 
                 
@@ -168,16 +193,45 @@ class AsymmetricRoadNetwork():
             Adds the entry and exit gates to the entry_gates and exit_gates lists respectively.
         """
         
-        #If the road network has only one outgoing direction and no incoming direction, it's an entry gate.
-        self.entry_gates = [node for node in self.outgoing if len(self.outgoing[node]) == 1 \
-                             and len(self.incoming.get(node, [])) == 0]
+        self.entry_gates, self.exit_gates = [], []
+        incoming = self.incoming
+
+        #Every node is added to both outgoing and incoming, so a single pass over the nodes finds both kinds of gates.
+        for node, edges in self.outgoing.items():
+            outgoing_count = len(edges)
+            incoming_count = len(incoming.get(node, ()))
 
-        #If the road network has only one incoming direction and no outgoing direction, it's an exit gate.
-        self.exit_gates  = [node for node in self.incoming if len(self.incoming[node]) == 1 \
-                             and len(self.outgoing.get(node, [])) == 0]
+            #If the road network has only one outgoing direction and no incoming direction, it's an entry gate.
+            if outgoing_count == 1 and incoming_count == 0:
+                self.entry_gates.append(node)
+
+            #If the road network has only one incoming direction and no outgoing direction, it's an exit gate.
+            elif incoming_count == 1 and outgoing_count == 0:
+                self.exit_gates.append(node)
 
  
 
+    def _to_csr_matrix(self) -> "csr_matrix":
+        """
+        Converts the outgoing road network to a sparse adjacency matrix, where the nodes are numbered in the order of outgoing.
+        Requires scipy.
+
+        Returns:
+            csr_matrix: The adjacency matrix of the road network.
+        """
+        outgoing = self.outgoing
+        size = len(outgoing)
+        ids = dict(zip(outgoing, range(size)))
+
+        #The rows are already grouped by node, so the compressed arrays are filled directly, without sorting any coordinates.
+        indices = [ids[endnode] for edges in outgoing.values() for _, endnode in edges]
+        #The index arrays are given as int32, which scipy uses for matrices of this size, so they are not converted again.
+        indptr = np.zeros(size + 1, dtype=np.int32)
+        indptr[1:] = np.fromiter(map(len, outgoing.values()), dtype=np.int32, count=size)
+        np.cumsum(indptr, out=indptr)
+
+        return csr_matrix((np.ones(len(indices), dtype=np.int8), np.array(indices, dtype=np.int32), indptr), shape=(size, size))
+
     def enforce_reachability(self) -> None:
         """
         Validates if every node is reachable from any entry gate.
@@ -185,18 +239,20 @@ class AsymmetricRoadNetwork():
         Raises:
             RunTimeError: If a node is not reachable from an entry gate
         """
-        visited = set()
-        stack = list(self.entry_gates)
+        #Nodes are marked as visited when they are pushed, so every node is pushed and expanded at most once.
+        outgoing = self.outgoing
+        visited = set(self.entry_gates)
+        stack = list(visited)
  
         while stack:
             node = stack.pop()
-            visited.add(node)
 
-            for _,neighbour in self.outgoing[node]:
+            for _,neighbour in outgoing[node]:
                 if neighbour not in visited:
+                    visited.add(neighbour)
                     stack.append(neighbour)
 
-        if len(visited) != len(self.outgoing):
+        if len(visited) != len(outgoing):
             raise RuntimeError("Not all nodes are reachable from an entry gate")
 
  
@@ -271,9 +327,8 @@ class CustomRoadNetwork(AsymmetricRoadNetwork):
         if not self.exit_gates:
             raise ValueError("At least one exit gate must be defined")
         
-        segments = self.convert_to_segments()
-        # Sort segments by direction
-        vertical_lines, horizontal_lines = self._sort_by_direction(segments)
+        # Sort segments by direction, read straight from the network without building a list of all segments first
+        vertical_lines, horizontal_lines = self._sort_by_direction(self._iter_segments())
         terminal_logger.info('Successfully sorted all segments into horizontal and vertical segments')
 
         # Check for overlap in vertical and horizontal lines
@@ -293,13 +348,13 @@ class CustomRoadNetwork(AsymmetricRoadNetwork):
         terminal_logger.info('All intersections have an entrance and exit')
            
     @staticmethod
-    def _sort_by_direction(segments: List[Segment]) -> Tuple[List[Segment], List[Segment]]:
+    def _sort_by_direction(segments: Iterable[Segment]) -> Tuple[List[Segment], List[Segment]]:
         """
         Sorts a list of segments into two lists of horizontal and vertical segments respectively.
         Only lists containing strictly vertical and horizontal segments are allowed. 
 
         Args:
-            segments: A list of all generated segments.
+            segments: A list or any other iterable of all generated segments.
 
         Returns:
             List[Segments],List[Segments]: Two different lists, one that contains all vertical segments and one that contains
@@ -337,15 +392,18 @@ class CustomRoadNetwork(AsymmetricRoadNetwork):
 
         # Determine axes based on orientation
         fixed_axis, main_axis = (1, 0) if orientation == 'horizontal' else (0, 1)
-        # Sort segments based on the main axis
-        sorted_segments = sorted(segments, key=lambda line: line[0][main_axis])
 
-        # Check each adjacent pair for overlap
-        for i in range(len(sorted_segments) - 1):
-            current_segment, next_segment = sorted_segments[i], sorted_segments[i + 1]
+        # Group the segments by the value of the fixed axis, only segments on the same line can overlap.
+        buckets = defaultdict(list)
+        for segment in segments:
+            buckets[segment[0][fixed_axis]].append(segment)
+
+        for line_segments in buckets.values():
+            # Sort segments based on the main axis
+            sorted_segments = sorted(line_segments, key=lambda line: line[0][main_axis])
 
-            # Only check if on the same axis.
-            if current_segment[0][fixed_axis] == next_segment[0][fixed_axis]:
+            # Check each adjacent pair for overlap
+            for current_segment, next_segment in zip(sorted_segments, sorted_segments[1:]):
 
                 #Extracts x values if horizontal and y values if vertical
                 A_start, A_end = current_segment[0][main_axis], current_segment[1][main_axis]
@@ -371,18 +429,108 @@ class CustomRoadNetwork(AsymmetricRoadNetwork):
         Raises:
             ValueError: If there are any intersections or nodes lying on segments.
         """
-        for h_seg in horizontal_lines:
-            h_min_x, h_max_x = sorted([h_seg[0][0], h_seg[1][0]])
-            for v_seg in vertical_lines:
-                v_min_y, v_max_y = sorted([v_seg[0][1], v_seg[1][1]])
+        if not horizontal_lines or not vertical_lines:
+            return
+
+        #Comparing every pair at once is faster for small networks, the sweep scales to large ones.
+        if len(horizontal_lines) * len(vertical_lines) <= _BROADCAST_PAIRS:
+            invalid = CustomRoadNetwork._first_invalid_pair_broadcast(horizontal_lines, vertical_lines)
+        else:
+            invalid = CustomRoadNetwork._first_invalid_pair_sweep(horizontal_lines, vertical_lines)
 
-                #Checks if any vertical segment crosses a horizontal line.
-                if (h_min_x <= v_seg[0][0] <= h_max_x) and v_min_y < h_seg[0][1] < v_max_y:
-                    raise ValueError(f"Intersection detected between {h_seg} and {v_seg}")
+        if invalid is not None:
+            i, j, crossing = invalid
+            h_seg, v_seg = horizontal_lines[i], vertical_lines[j]
+            if crossing:
+                raise ValueError(f"Intersection detected between {h_seg} and {v_seg}")
+            raise ValueError(f" {v_seg} has a starting or ending node on {h_seg}")
 
-                #Checks if any vertical line starts or ends on the horizontal segment.
-                elif (h_min_x < v_seg[0][0] < h_max_x) and ((v_min_y == h_seg[0][1]) or (v_max_y == h_seg[0][1])):
-                    raise ValueError(f" {v_seg} has a starting or ending node on {h_seg}")            
+    @staticmethod
+    def _first_invalid_pair_broadcast(horizontal_lines: Segments, vertical_lines: Segments) -> Optional[Tuple[int, int, bool]]:
+        """
+        Compares every horizontal segment with every vertical segment at once by numpy broadcasting.
+
+        Args:
+            horizontal_lines (List[Tuple[StartNode, EndNode]]): List of horizontal segments, at least one.
+            vertical_lines (List[Tuple[StartNode, EndNode]]): List of vertical segments, at least one.
+
+        Returns:
+            Optional[Tuple[int, int, bool]]: The indices of the first invalid pair, in the order of a pairwise loop,
+                                             and if the segments cross. None if no pair is invalid.
+        """
+        #Columns x1, y1, x2, y2 of every segment, the horizontal segments along the rows and the vertical along the columns.
+        h = np.array(horizontal_lines).reshape(-1, 4)
+        v = np.array(vertical_lines).reshape(-1, 4)
+        h_min_x = np.minimum(h[:, 0], h[:, 2])[:, None]
+        h_max_x = np.maximum(h[:, 0], h[:, 2])[:, None]
+        h_y = h[:, 1][:, None]
+        v_min_y = np.minimum(v[:, 1], v[:, 3])
+        v_max_y = np.maximum(v[:, 1], v[:, 3])
+        v_x = v[:, 0]
+
+        #Checks if any vertical segment crosses a horizontal line.
+        crossing = (h_min_x <= v_x) & (v_x <= h_max_x) & (v_min_y < h_y) & (h_y < v_max_y)
+
+        #Checks if any vertical line starts or ends on the horizontal segment.
+        touching = (h_min_x < v_x) & (v_x < h_max_x) & ((v_min_y == h_y) | (v_max_y == h_y))
+
+        invalid = crossing | touching
+        if not invalid.any():
+            return None
+        #The first pair in row major order is the pair a pairwise loop would find first.
+        i, j = np.argwhere(invalid)[0]
+        return int(i), int(j), bool(crossing[i, j])
+
+    @staticmethod
+    def _first_invalid_pair_sweep(horizontal_lines: Segments, vertical_lines: Segments) -> Optional[Tuple[int, int, bool]]:
+        """
+        Finds the invalid pairs of horizontal and vertical segments with a sweep along x,
+        which only compares the segments that share an x coordinate.
+
+        Args:
+            horizontal_lines (List[Tuple[StartNode, EndNode]]): List of horizontal segments.
+            vertical_lines (List[Tuple[StartNode, EndNode]]): List of vertical segments.
+
+        Returns:
+            Optional[Tuple[int, int, bool]]: The indices of the first invalid pair, in the order of a pairwise loop,
+                                             and if the segments cross. None if no pair is invalid.
+        """
+        #A horizontal segment is active from its smallest to its largest x.
+        #Events at the same x are ordered start, vertical, end, so both ends of a horizontal segment are included.
+        events = []
+        for i, ((x1, _), (x2, _)) in enumerate(horizontal_lines):
+            events.append((min(x1, x2), 0, i))
+            events.append((max(x1, x2), 2, i))
+        for j, ((x, _), _) in enumerate(vertical_lines):
+            events.append((x, 1, j))
+        events.sort()
+
+        #The active horizontal segments as (y, index), sorted so a vertical segment finds those in its y range by bisection.
+        active = []
+        invalid = []
+        for x, kind, k in events:
+            if kind == 0:
+                insort(active, (horizontal_lines[k][0][1], k))
+            elif kind == 2:
+                del active[bisect_left(active, (horizontal_lines[k][0][1], k))]
+            else:
+                v_seg = vertical_lines[k]
+                v_min_y, v_max_y = sorted([v_seg[0][1], v_seg[1][1]])
+                lo = bisect_left(active, (v_min_y, -1))
+                hi = bisect_right(active, (v_max_y, len(horizontal_lines)))
+                for h_y, i in active[lo:hi]:
+                    h_seg = horizontal_lines[i]
+                    h_min_x, h_max_x = sorted([h_seg[0][0], h_seg[1][0]])
+
+                    #Checks if the vertical segment crosses the horizontal line, the x range holds as the segment is active.
+                    crossing = v_min_y < h_y < v_max_y
+                    #Checks if the vertical line starts or ends on the horizontal segment.
+                    touching = (h_min_x < x < h_max_x) and ((v_min_y == h_y) or (v_max_y == h_y))
+                    if crossing or touching:
+                        invalid.append((i, k, crossing))
+
+        #The pair with the lowest indices is reported, as a pairwise loop over the segments would find it first.
+        return min(invalid) if invalid else None
 
     def _check_is_connected_network(self) -> None: 
         """
@@ -395,29 +543,43 @@ class CustomRoadNetwork(AsymmetricRoadNetwork):
         """
         if not self.outgoing:
             return
+
+        if csr_matrix is not None:
+            #The weakly connected components ignore the direction of the edges, like the symmetric closure of the Python search.
+            n_components, _ = connected_components(self._to_csr_matrix(), directed=True, connection='weak')
+            if n_components != 1:
+                raise ValueError('All roads are not connected')
+            return
         
-        #Construct a symmetric graph from the road network.
-        undirected_graph = {node: [] for node in self.outgoing}
-        for node in self.outgoing:
-            for _, endnode in self.outgoing[node]:
-                undirected_graph[node].append(endnode)
-                undirected_graph[endnode].append(node)
+        #Construct a symmetric graph from the road network, the sets hold every neighbour once.
+        outgoing = self.outgoing
+        undirected_graph = {node: set() for node in outgoing}
+        for node, edges in outgoing.items():
+            neighbours = undirected_graph[node]
+            for _, endnode in edges:
+                neighbours.add(endnode)
+                undirected_graph[endnode].add(node)
         
 
         #Set a starting node and initiate the search
         start_node = next(iter(undirected_graph)) 
-        visited = [start_node]
-        queue = [start_node]
+        #A set for the membership tests and a deque for the FIFO queue keep the search linear.
+        visited = {start_node}
+        queue = deque([start_node])
+        total_nodes = len(undirected_graph)
 
         #Terminates if all neighbors have been visited
         while queue:
-            node = queue.pop(0)
+            node = queue.popleft()
             for neighbor in undirected_graph[node]:
                 if neighbor not in visited:
-                    visited.append(neighbor)
+                    visited.add(neighbor)
                     queue.append(neighbor)
+            #Once every node is reached, the nodes left in the queue can't reach any new node.
+            if len(visited) == total_nodes:
+                return
 
-        if len(undirected_graph) != len(visited):
+        if total_nodes != len(visited):
             raise ValueError('All roads are not connected')
 
 class RandomRoadNetwork(AsymmetricRoadNetwork):
@@ -505,32 +667,37 @@ class RandomRoadNetwork(AsymmetricRoadNetwork):
         #The first segment is added, thus the counter starts at 1.
         generated_segments = 1
 
+        #The loop runs once per attempted segment, so the names it uses are bound once.
+        outgoing, incoming = self.outgoing, self.incoming
+        choice, pick_item = random.choice, utils.pick_item
+        get_available_directions, find_endnode, add_segment = self._get_available_directions, self._find_endnode, self._add_segment
+
         while generated_segments < total_segments:
-            startnode = random.choice(available_nodes)
-            available_directions = self._get_available_directions(startnode)
-            node_direction = utils.pick_item(available_directions)
+            startnode = choice(available_nodes)
+            node_direction = pick_item(get_available_directions(startnode))
 
             #If there exists a direction to move in, find the endnode and add the segment.
             if node_direction:
-                endnode = self._find_endnode(startnode, node_direction)
+                endnode = find_endnode(startnode, node_direction)
                 
                 #If the node is reached for the first time add it to the available nodes.
-                if not endnode in self.outgoing:
+                new_endnode = endnode not in outgoing
+                if new_endnode:
                     available_nodes.append(endnode)
                 
                 options = []
                 #If the startnode has incoming_roads directions, an outgoing segment is allowed
                 # IFF the endnode is not in the network or the endnode has outgoing directions.
-                if self.incoming.get(startnode, []) and (endnode not in self.outgoing or self.outgoing.get(endnode, []) != []):
+                if incoming.get(startnode) and (new_endnode or outgoing[endnode]):
                     options.append((startnode, endnode)) 
 
                 # If the startnode has outgoing directions, an incoming_roads segment is allowed
                 # IFF the endnode is not in the network or the endnode has incoming_roads directions.
-                if self.outgoing.get(startnode, []) and (endnode not in self.outgoing or self.incoming.get(endnode, []) != []):
+                if outgoing.get(startnode) and (new_endnode or incoming[endnode]):
                     options.append((endnode, startnode))
                 
                 if options:
-                    self._add_segment(random.choice(options))
+                    add_segment(choice(options))
                     generated_segments += 1
 
             else:
@@ -551,17 +718,20 @@ class RandomRoadNetwork(AsymmetricRoadNetwork):
             Side effects:
                 Assigns a node to the set of blocked nodes, when longer segment generation occurs.
             """
+            #The direction is the same for the whole segment, so it and the methods of the loop are bound once.
+            dx, dy = node_direction
+            get_available_directions, pick_item = self._get_available_directions, utils.pick_item
+            outgoing, blocked_nodes = self.outgoing, self.blocked_nodes
             while True:
                 x, y = node
-                dx, dy = node_direction
                 current_node = (x + dx, y + dy)
-                avail_dirs = self._get_available_directions(current_node)
+                avail_dirs = get_available_directions(current_node)
                 #Weight movement in the same direction higher to create longer segments more frequently.
-                new_direction = utils.pick_item(avail_dirs, weighted_item=node_direction, weight=2)
+                new_direction = pick_item(avail_dirs, weighted_item=node_direction, weight=2)
                 
                 #If the node is in the network, a longer segment can't generate across it.
-                if new_direction == node_direction and current_node not in self.outgoing:
-                    self.blocked_nodes.add(current_node)
+                if new_direction == node_direction and current_node not in outgoing:
+                    blocked_nodes.add(current_node)
                     #The loop is repeated from the newly generated node.
                     node = current_node
                 else:
@@ -580,9 +750,7 @@ class RandomRoadNetwork(AsymmetricRoadNetwork):
             True: if the node is already in the list of blocked nodes.
             False: if the node is not in the list of blocked nodes.
         """
-        if node in self.blocked_nodes:
-            return True
-        return False
+        return node in self.blocked_nodes
     
     def _get_available_directions(self, node: Node) -> List[Unit_Vector]:
         """
@@ -597,9 +765,11 @@ class RandomRoadNetwork(AsymmetricRoadNetwork):
 
         available_directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
         x,y = node
+        #Bound once, as they are looked up for every direction.
+        outgoing, blocked_nodes = self.outgoing, self.blocked_nodes
 
         # If the node is in the road network, get its connections else empty list.
-        for direction,_ in self.outgoing.get(node, []):
+        for direction,_ in outgoing.get(node, ()):
             available_directions.remove(direction)
       
         for direction in available_directions[:]:
@@ -607,12 +777,12 @@ class RandomRoadNetwork(AsymmetricRoadNetwork):
 
             #Validate if the node is a valid node to move to.
             new_node = (x+dx,y+dy)
-            if self._node_is_obstacle(new_node):
+            if new_node in blocked_nodes:
                 available_directions.remove(direction)
 
             #If the new node is in the network, check if the node is already connected to the current node.
-            elif new_node in self.outgoing:
-                for _, endnode in self.outgoing[new_node]:
+            elif new_node in outgoing:
+                for _, endnode in outgoing[new_node]:
                     if endnode == node:
                         available_directions.remove(direction)
 
@@ -630,35 +800,14 @@ class RandomRoadNetwork(AsymmetricRoadNetwork):
             ValueError: If the scalar value is not a positive integer.
 
         Side effects:
-            Overwrites the road network with the scaled values
+            Replaces the outgoing and incoming dictionaries with new dictionaries holding the scaled values.
         """
 
         if scalar < 1 or not isinstance(scalar, int):
             raise ValueError("Scalar value is not a positive integer.")
     
-        scaled_outgoing = {}
-        scaled_incoming = {}
-
-        for node in self.outgoing:
-            scaled_node = (node[0] * scalar, node[1] * scalar)  # Scale the node
-            scaled_outgoing[scaled_node] = []
-
-            for unitvector, endnode in self.outgoing[node]:
-                scaled_endnode = (endnode[0]*scalar, endnode[1]*scalar)
-                scaled_outgoing[scaled_node].append((unitvector,scaled_endnode))
-
-
-        for node in self.incoming:
-            scaled_node = (node[0] * scalar, node[1] * scalar)
-            scaled_incoming[scaled_node] = []
-
-            for endnode in self.incoming[node]:
-                scaled_endnode = (endnode[0]*scalar, endnode[1]*scalar)
-                scaled_incoming[scaled_node].append(scaled_endnode)
-
-            
-        # Update the original road_network with the scaled values
-        self.outgoing.clear()
-        self.incoming.clear()
-        self.outgoing.update(scaled_outgoing)
-        self.incoming.update(scaled_incoming)
+        #Rebuild both dictionaries with the scaled values in a single pass each.
+        self.outgoing = {(node[0]*scalar, node[1]*scalar): [(unitvector, (endnode[0]*scalar, endnode[1]*scalar)) for unitvector, endnode in edges]
+                         for node, edges in self.outgoing.items()}
+        self.incoming = {(node[0]*scalar, node[1]*scalar): [(startnode[0]*scalar, startnode[1]*scalar) for startnode in startnodes]
+                         for node, startnodes in self.incoming.items()}
@@ -22,7 +22,16 @@ class Utils():
             raise ValueError('Weight must be non-negative')
         if not items:
             return None
+
+        #Without a differently weighted item the pick is uniform, which random.choice does without building weights.
+        if weight == 1 or weighted_item not in items:
+            return random.choice(items)
         
-        weights = [weight if item == weighted_item else 1.0 for item in items]
+        #The cumulative weights are built directly, so random.choices does not accumulate a list of weights again.
+        cum_weights = []
+        total = 0.0
+        for item in items:
+            total += weight if item == weighted_item else 1.0
+            cum_weights.append(total)
 
-        return random.choices(items, weights=weights, k=1)[0]
+        return random.choices(items, cum_weights=cum_weights, k=1)[0]
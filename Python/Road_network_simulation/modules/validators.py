@@ -1,12 +1,22 @@
+import io
 import os
-from typing import Any, Callable, List
+import sys
+from typing import Any, Callable, List, Optional
 from modules.custom_types import Segment
+import numpy as np
 import re
 
 class Validators:
     """
     A utility class for validating user inputs.
     """
+    #Compiled once. A segment line holds four integers separated by commas, with optional whitespace around them.
+    _SEGMENT_PATTERN = re.compile(r"\s*(-?[0-9]+)\s*,\s*(-?[0-9]+)\s*,\s*(-?[0-9]+)\s*,\s*(-?[0-9]+)\s*")
+    _WHITESPACE_PATTERN = re.compile(r'\s*,\s*')
+    #A whole file of segment lines and blank lines, the whitespace within a line excludes the newline.
+    #The possessive quantifiers never give back what they matched, so a valid file is scanned without backtracking.
+    _LINE = r"[^\S\n]*+(?:-?[0-9]++[^\S\n]*+,[^\S\n]*+-?[0-9]++[^\S\n]*+,[^\S\n]*+-?[0-9]++[^\S\n]*+,[^\S\n]*+-?[0-9]++[^\S\n]*+)?"
+    _FILE_PATTERN = re.compile(rf"(?:{_LINE}\n)*+{_LINE}")
 
     @staticmethod
     def prompt(validator:Callable, prompt:str, **kwargs:Any)->Any:
@@ -21,9 +31,13 @@ class Validators:
         Returns:
             Any: The validated input.
         """
+        #The prompt is the same for every attempt, so it is built once.
+        full_prompt = prompt + '\n input: '
+        #Piped input is read directly, input() is kept for terminals as it provides line editing.
+        read_line = input if sys.stdin.isatty() else Validators._read_piped_line
         while True:
             try:
-                user_input = input(prompt + '\n input: ').strip().lower()
+                user_input = read_line(full_prompt).strip().lower()
                 if not user_input:
                     raise ValueError('Input cannot be empty.')
                 if validator is None:
@@ -33,6 +47,27 @@ class Validators:
             except ValueError as e:
                 print(e)
     
+    @staticmethod
+    def _read_piped_line(prompt:str)->str:
+        """
+        Writes the prompt and reads a line from sys.stdin, like input() but without its terminal handling.
+
+        Args:
+            prompt (str): The prompt message to display.
+
+        Returns:
+            str: The line read, without the trailing newline.
+
+        Raises:
+            EOFError: If the input has ended, as input() does.
+        """
+        sys.stdout.write(prompt)
+        sys.stdout.flush()
+        line = sys.stdin.readline()
+        if not line:
+            raise EOFError
+        return line.rstrip('\n')
+
     @staticmethod
     def validate_options(user_input:str, options:List[str])->str:
         """
@@ -142,23 +177,47 @@ class Validators:
             ValueError: If the file contains invalid data.
             IOError: If the file cannot be read.
         """
-        pattern = re.compile(r"^(-?[0-9]+),(-?[0-9]+),(-?[0-9]+),(-?[0-9]+)$")
-        append_fn = lambda match: ((int(match.group(1)), int(match.group(2))),
-                                    (int(match.group(3)), int(match.group(4))))
-        whitespace_pattern = re.compile(r'\s*,\s*')
-
-        items = []
         try:
             with open(path, 'r') as file:
-                for line in file:
-                    line = whitespace_pattern.sub(',', line.strip())
-                    if line and (match := pattern.match(line)):
-                        items.append(append_fn(match))
-                    elif line:
-                        raise ValueError(f"Error: Invalid line: {line} in '{path}'")
-            return items
-        
+                content = file.read()
         except IOError:
             raise IOError(f"Error: Could not read file: '{path}'")
-        
 
+        #Files where every line is valid are parsed by numpy in one call, the line by line parse finds the invalid line otherwise.
+        items = Validators._parse_valid_segments(content)
+        if items is not None:
+            return items
+
+        pattern, whitespace_pattern = Validators._SEGMENT_PATTERN, Validators._WHITESPACE_PATTERN
+        items = []
+        for line in io.StringIO(content):
+            if match := pattern.fullmatch(line):
+                x1, y1, x2, y2 = map(int, match.groups())
+                items.append(((x1, y1), (x2, y2)))
+            elif line := whitespace_pattern.sub(',', line.strip()):
+                raise ValueError(f"Error: Invalid line: {line} in '{path}'")
+        return items
+
+    @staticmethod
+    def _parse_valid_segments(content: str) -> Optional[List[Segment]]:
+        """
+        Parses the segments of a file in a single pass with numpy, if every line of the file is a segment or blank.
+
+        Args:
+            content (str): The content of the file.
+
+        Returns:
+            List[Segment]: The road segments of the file.
+            None: If a line is invalid, or a number does not fit in 64 bits.
+        """
+        if not content.strip():
+            return []
+        if not Validators._FILE_PATTERN.fullmatch(content):
+            return None
+        try:
+            data = np.loadtxt(io.StringIO(content), delimiter=',', dtype=np.int64, comments=None, ndmin=2)
+        except (ValueError, OverflowError):
+            return None
+        if data.shape[1] != 4:
+            return None
+        return [((x1, y1), (x2, y2)) for x1, y1, x2, y2 in data.tolist()]